@@ -0,0 +1,200 @@
+# measure the throughput and the peak memory of the modules parsers, offline, over recorded responses
+#
+#   > python benchmarks/parsers.py
+#   > python benchmarks/parsers.py --html-parser html.parser --html-parser lxml --rows 1000 --rows 100000
+#   > python benchmarks/parsers.py -m CertificatesSearch --rows 100000
+#   > python benchmarks/parsers.py --processes 4
+
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import get_context
+from os.path import abspath, dirname, join
+from io import BytesIO
+from time import perf_counter
+import tracemalloc
+import json
+import sys
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from subenum import import_dependencies, SubEnum, ThreatCrowd, CertificatesSearch, DNSDumpster, Google, Bing, Yahoo, VirusTotal, Shodan, MerkleMap, Censys
+from requests.models import Response
+
+
+# directory of the recorded responses
+fixtures_directory = join(dirname(abspath(__file__)), 'fixtures')
+
+# domain searched in the recorded responses
+domain = 'example.com'
+
+# recorded responses of each module, as (module, fixture file, kind of response)
+fixtures = [
+    (ThreatCrowd, 'threatcrowd.html', 'text'),
+    (CertificatesSearch, 'crtsh.html', 'text'),
+    (CertificatesSearch, 'crtsh.json', 'stream'),
+    (DNSDumpster, 'dnsdumpster.html', 'text'),
+    (Google, 'google.html', 'text'),
+    (Bing, 'bing.html', 'text'),
+    (Yahoo, 'yahoo.html', 'text'),
+    (VirusTotal, 'virustotal.json', 'json'),
+    (Shodan, 'shodan.json', 'json'),
+    (MerkleMap, 'merklemap.json', 'json'),
+    (Censys, 'censys.json', 'json'),
+]
+
+
+# main benchmark function
+def main():
+
+    # parse the cli parameters
+    parser = ArgumentParser(description="Subenum parsers benchmark")
+    parser.add_argument('-n', '--runs', type=int, default=20, help="Number of parses of each response")
+    parser.add_argument('-m', '--module', type=str, action='append', default=[], help="Only benchmark the parsers of a module")
+    parser.add_argument('--html-parser', type=str, action='append', default=[], choices=SubEnum.html_parsers, help="Html parser to benchmark, once per parser (default: html.parser)")
+    parser.add_argument('--rows', type=int, action='append', default=[], help="Number of rows of a synthetic crt.sh page, e.g. 100000 (default: 10000)")
+    parser.add_argument('--processes', type=int, help="Also compare the parses of all the responses by this number of threads, then of worker processes")
+    args = parser.parse_args()
+    html_parsers = args.html_parser if len(args.html_parser) > 0 else ['html.parser']
+    rows_counts = args.rows if len(args.rows) > 0 else [10000]
+
+    # get the responses to parse: the recorded ones and the synthetic crt.sh pages
+    cases = []
+    for module_class, filename, kind in fixtures:
+        with open(join(fixtures_directory, filename), 'rb') as fixture_file:
+            cases.append((module_class, filename, kind, fixture_file.read()))
+    for rows_count in rows_counts:
+        cases.append((CertificatesSearch, f"crtsh.html x{rows_count}", 'text', get_crtsh_html(rows_count)))
+        cases.append((CertificatesSearch, f"crtsh.json x{rows_count}", 'stream', get_crtsh_json(rows_count)))
+    if len(args.module) > 0:
+        cases = [case for case in cases if case[0].__name__ in args.module]
+
+    # benchmark each response with each html parser
+    print(f"{'module':<20}{'response':<22}{'parser':<13}{'size':>10}{'names':>9}{'time':>12}{'MB/s':>9}{'peak mem':>12}")
+    for module_class, name, kind, body in cases:
+        for html_parser in html_parsers if name.find('.html') != -1 else ['-']:
+            module = create_module(module_class, html_parser)
+            runs = args.runs if len(body) < 1000000 else 1
+            subdomains, seconds, peak_memory = benchmark(module, kind, body, runs)
+            print(f"{module_class.__name__:<20}{name:<22}{html_parser:<13}{format_size(len(body)):>10}{len(subdomains):>9}{seconds * 1000:>10.2f}ms{len(body) / seconds / 1000000:>9.1f}{format_size(peak_memory):>12}")
+
+    # parse all the responses at the same time, in threads then in worker processes
+    if args.processes is not None:
+        cases = [case for case in cases if case[0].process_parsing == True and case[2] != 'stream']
+        print()
+        for mode in ['threads', 'processes']:
+            seconds = benchmark_concurrency(cases, html_parsers[0], args.processes, mode == 'processes')
+            print(f"{len(cases)} responses parsed by {args.processes} {mode} in {seconds:0.2f} secs")
+
+
+# create a quiet module parsing with a html parser, with fake api keys
+def create_module(module_class, html_parser):
+    if module_class in [VirusTotal, Shodan]:
+        module = module_class('benchmark', verbose=False)
+    elif module_class == Censys:
+        module = module_class('benchmark', 'benchmark', verbose=False)
+    else:
+        module = module_class(verbose=False)
+    if html_parser != '-':
+        module.html_parser = html_parser
+    return module
+
+
+# get the median time and the peak memory of the parses of a response
+def benchmark(module, kind, body, runs):
+
+    # time each parse, without counting the creation of the response
+    times = []
+    for _ in range(runs):
+        response = create_response(kind, body)
+        start_time = perf_counter()
+        subdomains = parse(module, response)
+        times.append(perf_counter() - start_time)
+
+    # measure the memory allocated by a single parse
+    response = create_response(kind, body)
+    tracemalloc.start()
+    parse(module, response)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # return the subdomains found, the median time and the peak memory
+    times.sort()
+    return subdomains, times[len(times) // 2], peak_memory
+
+
+# get the time of the parses of responses by several threads, sending them to worker processes if needed
+def benchmark_concurrency(cases, html_parser, workers_count, use_processes):
+    parse_executor = ProcessPoolExecutor(max_workers=workers_count, mp_context=get_context('spawn')) if use_processes == True else None
+    try:
+        modules = []
+        for module_class, _, kind, body in cases:
+            module = create_module(module_class, html_parser if html_parser != '-' else 'html.parser')
+            module.parse_executor = parse_executor
+            modules.append((module, kind, body))
+
+        # start the worker processes and import their dependencies before timing the parses
+        if parse_executor is not None:
+            for future in [parse_executor.submit(import_dependencies) for _ in range(workers_count)]:
+                future.result()
+
+        # parse all the responses at the same time
+        with ThreadPoolExecutor(max_workers=workers_count) as executor:
+            start_time = perf_counter()
+            futures = [executor.submit(parse, module, create_response(kind, body)) for module, kind, body in modules]
+            for future in futures:
+                future.result()
+            return perf_counter() - start_time
+    finally:
+        if parse_executor is not None:
+            parse_executor.shutdown()
+
+
+# get the response passed to a parser from a recorded body
+def create_response(kind, body):
+    if kind == 'text':
+        return body.decode('utf-8')
+    elif kind == 'json':
+        return json.loads(body)
+    response = Response()
+    response.status_code = 200
+    response.headers['content-type'] = 'application/json'
+    response.encoding = 'utf-8'
+    response.raw = BytesIO(body)
+    return response
+
+
+# parse and normalize a response with the parser of a module
+def parse(module, response):
+    return module.parse_response(response, domain)
+
+
+# get a synthetic crt.sh html page with many certificates
+def get_crtsh_html(rows_count):
+    rows = []
+    for row in range(rows_count):
+        subdomain = f"host{row}.{domain}"
+        rows.append(f"<TR>\n<TD style=\"text-align:center\"><A href=\"?id={row}\">{row}</A></TD>\n<TD style=\"text-align:center\">2024-03-12</TD>\n<TD style=\"text-align:center\">2024-03-12</TD>\n<TD style=\"text-align:center\">2024-06-10</TD>\n<TD>{subdomain}</TD>\n<TD>{subdomain}<BR>www.{subdomain}</TD>\n<TD><A href=\"?caid=183267\">C=US, O=Let's Encrypt, CN=R3</A></TD>\n</TR>")
+    text = f"<HTML>\n<HEAD><TITLE>crt.sh | {domain}</TITLE></HEAD>\n<BODY>\n<TABLE>\n<TR><TD class=\"outer\">\n<TABLE>\n" + '\n'.join(rows) + "\n</TABLE>\n</TD></TR>\n</TABLE>\n</BODY>\n</HTML>\n"
+    return text.encode('utf-8')
+
+
+# get a synthetic crt.sh json page with many certificates
+def get_crtsh_json(rows_count):
+    certificates = []
+    for row in range(rows_count):
+        subdomain = f"host{row}.{domain}"
+        certificates.append({"issuer_ca_id": 183267, "issuer_name": "C=US, O=Let's Encrypt, CN=R3", "common_name": subdomain, "name_value": f"{subdomain}\nwww.{subdomain}", "id": row, "entry_timestamp": "2024-03-12T10:11:12.123", "not_before": "2024-03-12T09:11:12", "not_after": "2024-06-10T09:11:12", "serial_number": f"{row:032x}", "result_count": 2})
+    return json.dumps(certificates).encode('utf-8')
+
+
+# format a number of bytes
+def format_size(size):
+    for unit in ['B', 'KB', 'MB']:
+        if size < 1000:
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1000
+    return f"{size:.1f}GB"
+
+
+# run the benchmark
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+# measure the speed of the dns resolution stage against a local stub dns server
+#
+#   > python benchmarks/resolve.py
+#   > python benchmarks/resolve.py --names 100000 --concurrency 1000
+#   > python benchmarks/resolve.py --cache-size 10000
+
+from argparse import ArgumentParser
+from os.path import abspath, dirname
+from multiprocessing import Process, Queue
+from time import perf_counter
+import asyncio
+import socket
+import struct
+import sys
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from subenum import DnsResolver
+
+
+# zone answered by the stub server
+zone = 'example.com'
+
+
+# dns server answering the live names, the names under the wildcard zone, and nxdomain for the others
+class StubDnsServer(asyncio.DatagramProtocol):
+
+    # keep the transport of the socket
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+
+    # answer a query
+    def datagram_received(self, data, address):
+        query_id, _, _, _, _, _ = struct.unpack('>HHHHHH', data[:12])
+        pos = 12
+        labels = []
+        while data[pos] != 0:
+            labels.append(data[pos + 1:pos + 1 + data[pos]].decode('ascii'))
+            pos += data[pos] + 1
+        record_type, _ = struct.unpack('>HH', data[pos + 1:pos + 5])
+        question = data[12:pos + 5]
+        name = '.'.join(labels)
+
+        # get the answers of the name
+        answers = []
+        if name.endswith('.wild.' + zone) == True:
+            answers.append((1, bytes([10, 9, 9, 9])))
+        elif name.startswith('live') == True and name.endswith('.' + zone) == True:
+            number = int(labels[0][4:])
+            if record_type == 1:
+                answers.append((1, bytes([10, (number >> 16) & 0xff, (number >> 8) & 0xff, number & 0xff])))
+        rcode = 0 if len(answers) > 0 or name.startswith('live') == True else 3
+
+        # send the response, pointing to the question name
+        response = struct.pack('>HHHHHH', query_id, 0x8180 | rcode, 1, len(answers), 0, 0) + question
+        for answer_type, rdata in answers:
+            response += struct.pack('>HHHIH', 0xc00c, answer_type, 1, 300, len(rdata)) + rdata
+        self.transport.sendto(response, address)
+
+
+# run the stub server in its own process and send its port
+def run_stub_server(ports):
+    async def serve():
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(StubDnsServer, local_addr=('127.0.0.1', 0))
+        ports.put(transport.get_extra_info('sockname')[1])
+        await asyncio.Event().wait()
+    asyncio.run(serve())
+
+
+# main benchmark function
+def main():
+
+    # parse the cli parameters
+    parser = ArgumentParser(description="Subenum dns resolution benchmark")
+    parser.add_argument('-n', '--names', type=int, default=100000, help="Number of names to resolve")
+    parser.add_argument('-c', '--concurrency', type=int, default=500, help="Number of concurrent queries")
+    parser.add_argument('--cache-size', type=int, default=100000, help="Number of answers and wildcards kept by the resolver")
+    args = parser.parse_args()
+
+    # start the stub server
+    ports = Queue()
+    server = Process(target=run_stub_server, args=(ports,), daemon=True)
+    server.start()
+    port = ports.get()
+
+    # resolve live, dead and wildcard names, then the same names again from the cache
+    try:
+        names = []
+        for number in range(args.names):
+            if number % 10 < 5:
+                names.append(f"live{number}.{zone}")
+            elif number % 10 < 6:
+                names.append(f"host{number}.wild.{zone}")
+            else:
+                names.append(f"dead{number}.{zone}")
+        resolver = DnsResolver([f"127.0.0.1:{port}"], concurrency=args.concurrency, cache_size=args.cache_size)
+        for step in ['resolve', 'cached']:
+            queries_count = resolver.queries_count
+            start_time = perf_counter()
+            records = resolver.resolve_many(names)
+            elapsed_time = perf_counter() - start_time
+            print(f"{step:<8} {len(names)} names in {elapsed_time:0.2f} secs ({len(names) / elapsed_time * 60:0.0f} names/min), {resolver.queries_count - queries_count} queries, {len(records)} live hosts, {len(resolver.answers)} cached answers")
+    finally:
+        server.terminate()
+
+
+# run the benchmark
+if __name__ == '__main__':
+    main()
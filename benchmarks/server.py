@@ -0,0 +1,139 @@
+# measure the scan server running concurrent jobs against local stub sources, and check that each job keeps its own results and metrics
+#
+#   > python benchmarks/server.py
+#   > python benchmarks/server.py --jobs 8 --domains 20 --names 1000
+
+from argparse import ArgumentParser
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from os.path import abspath, dirname
+from threading import Thread
+from time import perf_counter, sleep
+from urllib.request import Request, urlopen
+import json
+import sys
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from subenum import SubEnum, ScanServer, ModuleApi
+
+
+# seconds waited by the slow source before answering, longer than its module timeout
+slow_delay = 3
+slow_timeout = 1
+
+
+# http server answering '/<delay>/<names count>/<domain>' with a list of subdomains
+class StubSourceHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    # answer the names of a domain after a delay
+    def do_GET(self):
+        _, delay, names_count, domain = self.path.split('/')
+        sleep(float(delay))
+        body = '\n'.join(f"host{number}.{domain}" for number in range(int(names_count))).encode('utf-8')
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    # do not log the requests
+    def log_message(self, format, *args):
+        pass
+
+
+# module querying the stub server
+class StubSource(ModuleApi):
+
+    # create a module answering a number of names per domain after a delay
+    def __init__(self, name, url, delay, names_count):
+        super().__init__(verbose=False)
+        self.base_name = name
+        self.url = url
+        self.delay = delay
+        self.names_count = names_count
+
+    # query the names of a domain
+    def query_domain(self, domain):
+        return self.request('GET', f"{self.url}/{self.delay}/{self.names_count}/{domain}").text
+
+    # parse the names of a domain
+    def parse_query_response(self, text, domain):
+        return text.split()
+
+
+# main benchmark function
+def main():
+
+    # parse the cli parameters
+    parser = ArgumentParser(description="Subenum scan server benchmark")
+    parser.add_argument('-j', '--jobs', type=int, default=4, help="Number of jobs running at the same time")
+    parser.add_argument('-d', '--domains', type=int, default=5, help="Number of domains of each job")
+    parser.add_argument('-n', '--names', type=int, default=100, help="Number of names found by each fast source for each domain")
+    args = parser.parse_args()
+
+    # start the stub sources and the scan server, the slow source always times out
+    sources = ThreadingHTTPServer(('127.0.0.1', 0), StubSourceHandler)
+    sources.daemon_threads = True
+    Thread(target=sources.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{sources.server_address[1]}"
+    subenum = SubEnum(verbose=False, max_workers=32, module_timeouts={'Slow': slow_timeout})
+    subenum.modules = [StubSource('Fast', url, 0, args.names), StubSource('Medium', url, 0.2, args.names), StubSource('Slow', url, slow_delay, args.names)]
+    server = ScanServer(subenum, port=0, jobs_count=args.jobs)
+    Thread(target=server.serve_forever, daemon=True).start()
+    server_url = f"http://127.0.0.1:{server.http_server.server_address[1]}"
+
+    # run the jobs at the same time, each one on its own domains
+    start_time = perf_counter()
+    jobs = []
+    for job_number in range(args.jobs):
+        domains = [f"job{job_number}-domain{number}.com" for number in range(args.domains)]
+        request = Request(f"{server_url}/scans", data=json.dumps({'domains': domains}).encode('utf-8'), method='POST')
+        with urlopen(request) as response:
+            jobs.append(json.loads(response.read()))
+    results = {}
+    readers = [Thread(target=read_results, args=(server_url, job['id'], results)) for job in jobs]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    elapsed_time = perf_counter() - start_time
+
+    # check the subdomains and the metrics of each job
+    errors = []
+    print(f"{'job':<6}{'status':<10}{'names':>8}{'Fast req':>10}{'Medium req':>12}{'Slow timed out':>16}")
+    for job in jobs:
+        with urlopen(f"{server_url}/scans/{job['id']}") as response:
+            summary = json.loads(response.read())
+        modules = summary['stats']['modules'] if summary['stats'] is not None else {}
+        print(f"{job['id']:<6}{summary['status']:<10}{len(results[job['id']]):>8}{modules.get('Fast', {}).get('requests', '-'):>10}{modules.get('Medium', {}).get('requests', '-'):>12}{modules.get('Slow', {}).get('timed_out', '-'):>16}")
+        expected_names = {f"host{number}.{domain}" for domain in job['domains'] for number in range(args.names)}
+        if summary['status'] != 'done':
+            errors.append(f"job {job['id']} ended as '{summary['status']}': {summary['error']}")
+        elif set(results[job['id']]) != expected_names:
+            errors.append(f"job {job['id']} found {len(results[job['id']])} names instead of {len(expected_names)}")
+        elif modules['Fast']['requests'] != args.domains or modules['Medium']['requests'] != args.domains or modules['Slow']['timed_out'] != args.domains:
+            errors.append(f"job {job['id']} has the metrics of another job")
+    names_count = sum(len(names) for names in results.values())
+    print(f"\n{args.jobs} jobs of {args.domains} domains in {elapsed_time:0.2f} secs ({names_count / elapsed_time:0.0f} names/s)")
+
+    # fail if a job lost its results or its metrics
+    server.shutdown()
+    for error in errors:
+        print(f"error: {error}")
+    if len(errors) > 0:
+        sys.exit(1)
+
+
+# stream the names found by a job
+def read_results(server_url, job_id, results):
+    with urlopen(f"{server_url}/scans/{job_id}/results") as response:
+        results[job_id] = [json.loads(line)['name'] for line in response]
+
+
+# run the benchmark
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# measure the startup time of subenum, as seen by the job runners invoking the cli many times
+#
+#   > python benchmarks/startup.py
+#   > git show HEAD~1:subenum.py > /tmp/subenum_old.py && python benchmarks/startup.py --compare /tmp/subenum_old.py
+
+from argparse import ArgumentParser
+from os.path import abspath, dirname, join, basename, splitext
+from statistics import median
+from subprocess import run
+import sys
+
+
+# path of the subenum module of this tree
+default_module = join(dirname(dirname(abspath(__file__))), 'subenum.py')
+
+# python code timed in a fresh interpreter for each step
+steps = {
+    'import': "import {name}",
+    'create': "import {name}; {name}.SubEnum(verbose=False)",
+    'modules': "import {name}; {name}.SubEnum(verbose=False).modules",
+}
+
+
+# main benchmark function
+def main():
+
+    # parse the cli parameters
+    parser = ArgumentParser(description="Subenum startup benchmark")
+    parser.add_argument('-n', '--runs', type=int, default=10, help="Number of runs of each step")
+    parser.add_argument('--compare', type=str, help="Another subenum.py file to compare with (e.g. an older version)")
+    args = parser.parse_args()
+
+    # time each step of the modules
+    modules = [default_module]
+    if args.compare is not None:
+        modules.append(abspath(args.compare))
+    results = {module: time_module(module, args.runs) for module in modules}
+
+    # print the median time of each step
+    print(f"{'step':<14}" + ''.join(f"{label(module):>20}" for module in modules))
+    for step in list(steps) + ['cli --help']:
+        print(f"{step:<14}" + ''.join(f"{results[module][step] * 1000:>18.1f}ms" for module in modules))
+
+
+# get the median time of each step of a subenum module
+def time_module(module, runs):
+    name = splitext(basename(module))[0]
+    results = {}
+    for step, code in steps.items():
+        code = f"import sys; sys.path.insert(0, {dirname(module)!r}); from time import perf_counter; start = perf_counter(); {code.format(name=name)}; print(perf_counter() - start)"
+        results[step] = median(time_code([sys.executable, '-c', code]) for _ in range(runs))
+    code = f"import sys, runpy; from time import perf_counter; start = perf_counter(); sys.argv = ['subenum', '--help']\ntry:\n    runpy.run_path({module!r}, run_name='__main__')\nexcept SystemExit:\n    pass\nprint(perf_counter() - start, file=sys.stderr)"
+    results['cli --help'] = median(time_code([sys.executable, '-c', code], stderr=True) for _ in range(runs))
+    return results
+
+
+# run python code in a new interpreter and get the time it printed
+def time_code(command, stderr=False):
+    process = run(command, capture_output=True, text=True, check=True)
+    output = process.stderr if stderr == True else process.stdout
+    return float(output.strip().splitlines()[-1])
+
+
+# get a short label for a module path
+def label(module):
+    return 'current' if module == default_module else basename(module)
+
+
+# run the benchmark
+if __name__ == '__main__':
+    main()
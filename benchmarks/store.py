@@ -0,0 +1,91 @@
+# compare the memory and the speed of the subdomains trie with a flat sorted list of names, and of the compact collector of the scans with the default one
+#
+#   > python benchmarks/store.py
+#   > python benchmarks/store.py --names 5000000
+
+from argparse import ArgumentParser
+from os.path import abspath, dirname
+from time import perf_counter
+import tracemalloc
+import random
+import sys
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from subenum import SubdomainsTrie, SubdomainsCollector, CompactSubdomainsCollector, get_subdomain_sort_key
+
+
+# domain of the synthetic names
+domain = 'example.com'
+
+# common first labels of the hosts
+words = ['www', 'mail', 'api', 'dev', 'staging', 'vpn', 'cdn', 'app', 'm', 'test']
+
+# modules reporting the names to the collectors
+sources = ['CertificatesSearch', 'VirusTotal', 'Google', 'Bing', 'Censys']
+
+
+# main benchmark function
+def main():
+
+    # parse the cli parameters
+    parser = ArgumentParser(description="Subenum subdomains store benchmark")
+    parser.add_argument('-n', '--names', type=int, default=1000000, help="Number of names to store")
+    args = parser.parse_args()
+
+    # store the names in a sorted list, then in a trie
+    print(f"{'store':<8}{'names':>10}{'memory':>12}{'bytes/name':>12}{'build':>10}{'iterate':>10}{'query':>10}")
+    benchmark('list', args.names, lambda names: sorted(set(names), key=get_subdomain_sort_key), lambda store: [name for name in store if name.endswith('.zone5.' + domain) == True])
+    benchmark('trie', args.names, SubdomainsTrie, lambda store: list(store.iter_subdomains('zone5.' + domain)))
+
+    # collect the names with their sources and first seen times, as the scans do
+    benchmark('dict', args.names, lambda names: collect(SubdomainsCollector(), names), lambda store: [name for name in store if name.endswith('.zone5.' + domain) == True])
+    benchmark('compact', args.names, lambda names: collect(CompactSubdomainsCollector(), names), lambda store: list(store.iter_subdomains('zone5.' + domain)))
+
+
+# add the names to a collector, each one reported by a module at a time
+def collect(collector, names):
+    for number, name in enumerate(names):
+        collector.add(name, source=sources[number % len(sources)], seen_time=float(number))
+    return collector
+
+
+# yield hosts numbered in a few regions, common hosts in many zones, and numbered hosts of the domain
+def iter_names(names_count):
+    random.seed(0)
+    for number in range(names_count):
+        kind = random.random()
+        if kind < 0.5:
+            yield f"host{number}.region{number % 50}.{domain}"
+        elif kind < 0.8:
+            yield f"{random.choice(words)}.zone{number % 20000}.{domain}"
+        else:
+            yield f"{random.choice(words)}{number}.{domain}"
+
+
+# print the memory and the times of a store of names
+def benchmark(name, names_count, create_store, query_store):
+
+    # measure the memory kept by the store, then the time of its creation without tracing
+    tracemalloc.start()
+    store = create_store(iter_names(names_count))
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    start_time = perf_counter()
+    store = create_store(iter_names(names_count))
+    build_time = perf_counter() - start_time
+
+    # time a full iteration and a query of the names of a zone
+    start_time = perf_counter()
+    for _ in store:
+        pass
+    iterate_time = perf_counter() - start_time
+    start_time = perf_counter()
+    query_store(store)
+    query_time = perf_counter() - start_time
+    print(f"{name:<8}{len(store):>10}{memory / 1000000:>10.1f}MB{memory / len(store):>12.1f}{build_time:>9.2f}s{iterate_time:>9.2f}s{query_time * 1000:>8.1f}ms")
+
+
+# run the benchmark
+if __name__ == '__main__':
+    main()
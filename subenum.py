@@ -5,187 +5,3247 @@ banner = """
                                    by zen
 """
 
+import sys
 try:
-    from requests import Session
-    from requests.auth import HTTPBasicAuth
-    from bs4 import BeautifulSoup
-    from fake_useragent import UserAgent
     from urllib.parse import unquote
+    from email.utils import parsedate_to_datetime
     from argparse import ArgumentParser
-    from os import getenv
-    from dotenv import load_dotenv
-    from threading import Thread
+    from os import getenv, makedirs, getpid
+    from os.path import expanduser, join, exists
+    from concurrent.futures import Future, wait, FIRST_COMPLETED
+    from contextvars import ContextVar, copy_context
+    from functools import lru_cache
+    from queue import Queue, Empty
+    from io import BytesIO
+    from http.client import HTTPMessage
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    from hashlib import sha1, blake2b
+    from threading import Thread, Lock, Condition, Event, Semaphore, current_thread
     from time import time, sleep
+    from random import uniform, getrandbits
+    from socket import inet_ntop, AF_INET, AF_INET6, SOL_SOCKET, SO_RCVBUF
+    from datetime import datetime, timezone
+    from array import array
+    import struct
+    import math
+    import re
+    import codecs
+    import gzip
+    import json
+    import csv
+    import sqlite3
 except KeyboardInterrupt:
-    print(banner)
-    print("[*] Exiting...")
+    print(banner, file=sys.stderr)
+    print("[*] Exiting...", file=sys.stderr)
+
+
+# import the dependencies of the scans when they are first needed, so that importing subenum stays fast
+def import_dependencies():
+    global Session, HTTPBasicAuth, HTTPAdapter, ConnectionError, Timeout, ChunkedEncodingError, RequestException
+    global Response, BeautifulSoup, SoupStrainer, FeatureNotFound, UserAgent, asyncio
+    from requests import Session, Response
+    from requests.auth import HTTPBasicAuth
+    from requests.adapters import HTTPAdapter
+    from requests.exceptions import ConnectionError, Timeout, ChunkedEncodingError, RequestException
+    from bs4 import BeautifulSoup, SoupStrainer, FeatureNotFound
+    from fake_useragent import UserAgent
+    import asyncio
+
+
+# import the http client of the asyncio engine, only needed by the async scans
+def import_async_dependencies():
+    global aiohttp
+    import_dependencies()
+    import aiohttp
+
+
+# parse a response in a worker process, with a bare module of a class holding only the attributes used by its parser
+def parse_in_process(module_class, state, response, domain):
+    import_dependencies()
+    module = module_class.__new__(module_class)
+    module.__dict__.update(state)
+    return module.parse_normalized_response(response, domain)
 
 
 # main CLI function
 def main():
 
-    # print the banner
-    print(banner)
+    # print the banner on the error output, which also gets the logs, to keep the standard output for the subdomains
+    print(banner, file=sys.stderr)
+
+    # run the scan server in serve mode
+    if sys.argv[1:2] == ['serve']:
+        serve(sys.argv[2:])
+        return
 
     # parse the cli parameters
     parser = ArgumentParser(description="Subdomains Enumerator")
-    parser.add_argument('domain', type=str, help="Domain to search for subdomains")
-    parser.add_argument('-o', '--output', type=str, help="Save the output in a text file")
+    parser.add_argument('domain', type=str, nargs='?', help="Domain to search for subdomains")
+    parser.add_argument('-i', '--input-file', type=str, help="Read the domains to search from a text file")
+    parser.add_argument('-o', '--output', type=str, help="Save the output in a file")
+    parser.add_argument('--format', type=str, default='txt', choices=SubdomainsWriter.formats, help="Format of the output, the json lines and csv records include the sources and the first seen time of each subdomain")
+    parser.add_argument('--compress', type=str, choices=SubdomainsWriter.compressions, help="Compress the output file (default: from the '.gz' or '.zst' extension of the output)")
+    parser.add_argument('-s', '--stream', action='store_true', help="Output the subdomains as soon as they are found")
+    parser.add_argument('--asyncio', action='store_true', help="Run the scan in an event loop instead of threads, to keep many requests in flight (requires aiohttp)")
+    add_scan_arguments(parser)
+    parser.add_argument('-p', '--permutations', type=str, help="Save the candidates derived from the subdomains found in a text file")
+    parser.add_argument('--permutation-words', type=str, help="Words inserted in the permutations, one per line")
+    parser.add_argument('--stats', type=str, help="Save the metrics of the modules in a json file")
+    parser.add_argument('--trace', type=str, help="Save a timeline of the scan in a json trace file, readable by chrome://tracing or perfetto")
+    parser.add_argument('-b', '--baseline', type=str, help="Only output the subdomains added (+) or removed (-) since a previous output file")
+    parser.add_argument('--stop-early', action='store_true', help="Stop paginating a source when its pages only contain subdomains of the baseline")
+    parser.add_argument('--update-baseline', action='store_true', help="Save the current subdomains in the baseline file")
+    args = parser.parse_args()
+
+    # get the list of domains to scan
+    if args.domain is None and args.input_file is None:
+        parser.error("a domain or an input file is required")
+    domains = []
+    if args.domain is not None:
+        domains.append(args.domain)
+    if args.input_file is not None:
+        if exists(args.input_file) == False:
+            parser.error(f"input file not found: '{args.input_file}'")
+        domains += read_domains_file(args.input_file)
+    if args.baseline is None and (args.stop_early == True or args.update_baseline == True):
+        parser.error("--stop-early and --update-baseline require a baseline")
+    if args.baseline is not None and args.update_baseline == False and exists(args.baseline) == False:
+        parser.error(f"baseline file not found: '{args.baseline}', add --update-baseline to create it")
+    if args.baseline is not None and args.stream == True:
+        parser.error("--stream cannot be used with a baseline")
+    if args.resolve == True and args.stream == True:
+        parser.error("--stream cannot be used with --resolve")
+    if args.permutations is not None and (args.stream == True or args.baseline is not None):
+        parser.error("--permutations cannot be used with --stream or a baseline")
+    compression = args.compress if args.compress is not None else SubdomainsWriter.get_compression(args.output)
+    if compression is not None and args.output is None:
+        parser.error("--compress requires an output file")
+    if args.baseline is not None and (args.format != 'txt' or compression is not None):
+        parser.error("the changes since a baseline are only written as text")
+    if args.asyncio == True and (args.baseline is not None or args.record is not None or args.replay is not None):
+        parser.error("--asyncio cannot be used with a baseline, --record or --replay")
+    if args.asyncio == True:
+        try:
+            import_async_dependencies()
+        except ImportError:
+            parser.error("the asyncio engine requires the 'aiohttp' package")
+
+    # create the subenum object with the options of the scans
+    subenum = create_subenum(parser, args, tracer=ScanTracer() if args.trace is not None else None)
+
+    # open the output of the subdomains, flushing each subdomain streamed to the console
+    writer = None
+    if args.baseline is None:
+        try:
+            writer = SubdomainsWriter(args.output, output_format=args.format, compression=compression, flush=args.stream == True and args.output is None)
+        except ImportError:
+            parser.error("the zstd compression requires the 'zstandard' package")
+
+    # output the subdomains as soon as they are found in stream mode
+    if args.stream == True and args.asyncio == True:
+        asyncio.run(aoutput_subdomains_stream(subenum, domains, writer))
+    elif args.stream == True:
+        output_subdomains_stream(subenum, domains, writer)
+
+    # only output the changes since the baseline
+    elif args.baseline is not None:
+        output_baseline_changes(subenum, domains, args.baseline, args.output, args.stop_early, args.update_baseline)
+
+    # output all the subdomains at the end of the scan, and their permutations if needed
+    else:
+        results = output_subdomains(subenum, domains, writer, use_asyncio=args.asyncio)
+        if args.permutations is not None:
+            output_permutations(results, args.permutations, args.permutation_words, subenum.verbose)
+
+    # save the metrics of the modules and the timeline of the scan
+    if args.stats is not None:
+        with open(args.stats, 'w') as stats_file:
+            json.dump(subenum.last_stats, stats_file, indent=2)
+    if args.trace is not None:
+        subenum.tracer.save(args.trace)
+
+
+# run the scan server until it is interrupted
+def serve(arguments):
+
+    # parse the cli parameters of the server
+    parser = ArgumentParser(prog='subenum serve', description="Subdomains Enumerator scan server")
+    parser.add_argument('--host', type=str, default='127.0.0.1', help="Address the server listens on")
+    parser.add_argument('--port', type=int, default=ScanServer.default_port, help="Port the server listens on")
+    parser.add_argument('-j', '--jobs', type=int, default=2, help="Maximum number of scan jobs running at the same time")
+    parser.add_argument('--kept-jobs', type=int, default=100, help="Number of finished jobs kept with their subdomains")
+    add_scan_arguments(parser)
+    args = parser.parse_args(arguments)
+
+    # create the subenum object shared by all the jobs
+    subenum = create_subenum(parser, args)
+    try:
+        server = ScanServer(subenum, host=args.host, port=args.port, jobs_count=args.jobs, kept_jobs=args.kept_jobs)
+    except OSError as e:
+        parser.error(f"cannot listen on {args.host}:{args.port}: {e.strerror}")
+
+    # run the jobs until the server is interrupted
+    if subenum.verbose == True:
+        print(f"[*] Listening on http://{args.host}:{args.port} with {len(subenum.modules)} modules.", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("[*] Exiting...", file=sys.stderr)
+    finally:
+        server.shutdown()
+
+
+# add the cli parameters of the scans, shared by the cli and the scan server
+def add_scan_arguments(parser):
     parser.add_argument('-f', '--fast', action='store_true', help="Enable fast mode")
     parser.add_argument('-q', '--quiet', action='store_true', help="Disable verbosity")
-    args = parser.parse_args()
+    parser.add_argument('-w', '--workers', type=int, help="Maximum number of modules running at the same time")
+    parser.add_argument('--cache-dir', type=str, default=ResponseCache.default_directory, help="Directory of the responses cache")
+    parser.add_argument('--cache-ttl', type=int, default=ResponseCache.default_ttl, help="Number of seconds before a cached response expires")
+    parser.add_argument('--cache-size', type=int, default=ResponseCache.default_max_size // 1000000, help="Maximum size of the responses cache in MB")
+    parser.add_argument('--no-cache', action='store_true', help="Disable the responses cache")
+    parser.add_argument('--html-parser', type=str, default='html.parser', choices=SubEnum.html_parsers, help="Parser used to read the html responses")
+    parser.add_argument('--exclude-expired', action='store_true', help="Skip the expired certificates of crt.sh")
+    parser.add_argument('--rate-limit', type=str, action='append', default=[], help="Maximum requests rate of a module, as 'Module=requests[/seconds]' (e.g. 'VirusTotal=4/60')")
+    parser.add_argument('--retries', type=int, default=3, help="Number of retries of a request failing because of the network or the server")
+    parser.add_argument('--retry-backoff', type=float, default=0.5, help="Number of seconds before the first retry, doubled at each retry")
+    parser.add_argument('-d', '--deadline', type=float, help="Maximum number of seconds of the whole scan, keeping the subdomains found so far")
+    parser.add_argument('--module-timeout', type=str, action='append', default=[], help="Maximum number of seconds of a module scan, for all the modules or as 'Module=seconds'")
+    parser.add_argument('--timeout', type=float, help="Maximum number of seconds to connect or to wait for data in a request")
+    parser.add_argument('--pool-size', type=int, help="Maximum number of connections kept alive per host")
+    parser.add_argument('--record', type=str, help="Record the http exchanges of the scan in a directory")
+    parser.add_argument('--replay', type=str, help="Replay the http exchanges recorded in a directory instead of using the network")
+    parser.add_argument('--replay-speed', type=float, default=1, help="Speed factor of the replayed exchanges, 0 to replay them as fast as possible")
+    parser.add_argument('--pages-fanout', type=int, help="Number of pages of a search engine downloaded at the same time")
+    parser.add_argument('--parse-processes', type=int, help="Parse the html responses in a number of worker processes, to use several cores")
+    parser.add_argument('--compact', action='store_true', help="Keep the subdomains found in a compact trie of their labels, to use less memory on large scans")
+    parser.add_argument('-r', '--resolve', action='store_true', help="Only output the subdomains that resolve, with their dns records")
+    parser.add_argument('--resolvers', type=str, help="Nameservers used to resolve the subdomains, as a list of 'host[:port]' separated by commas or a file")
+    parser.add_argument('--dns-concurrency', type=int, default=500, help="Maximum number of dns queries sent at the same time")
+    parser.add_argument('--dns-timeout', type=float, default=2, help="Number of seconds before a dns query is sent again")
+
+
+# create a subenum object from the cli parameters of the scans
+def create_subenum(parser, args, tracer=None):
+    if args.record is not None and args.replay is not None:
+        parser.error("--record and --replay cannot be used together")
 
     # load the api keys
+    from dotenv import load_dotenv
     load_dotenv()
     vt_api_key = getenv('VIRUSTOTAL_API_KEY')
     shodan_api_key = getenv('SHODAN_API_KEY')
     censys_appid = getenv('CENSYS_APP_ID')
     censys_secret = getenv('CENSYS_SECRET')
 
-    # get the subdomains from subenum
+    # parse the rate limits of the modules
+    rate_limits = {}
+    for rate_limit in args.rate_limit:
+        try:
+            rate_limits.update(parse_rate_limit(rate_limit))
+        except ValueError:
+            parser.error(f"invalid rate limit: '{rate_limit}'")
+
+    # parse the timeouts of the modules
+    module_timeout = None
+    module_timeouts = {}
+    for timeout in args.module_timeout:
+        try:
+            if timeout.find('=') == -1:
+                module_timeout = float(timeout)
+            else:
+                module, seconds = timeout.split('=')
+                module_timeouts[module.strip()] = float(seconds)
+        except ValueError:
+            parser.error(f"invalid module timeout: '{timeout}'")
+
+    # size the connection pool for the number of workers
+    connection_pool = None
+    if args.pool_size is not None or (args.workers is not None and args.workers > ConnectionPool.get_default().connections_count):
+        connection_pool = ConnectionPool(connections_count=args.pool_size if args.pool_size is not None else args.workers)
+
+    # record or replay the http exchanges
+    recorder = None
+    if args.record is not None:
+        recorder = ResponseRecorder(args.record, connection_pool=connection_pool)
+    elif args.replay is not None:
+        try:
+            recorder = ResponseRecorder(args.replay, replay=True, speed=args.replay_speed)
+        except FileNotFoundError:
+            parser.error(f"no recorded exchanges in '{args.replay}'")
+
+    # resolve the subdomains with the system or the given nameservers
+    resolver = None
+    if args.resolve == True:
+        nameservers = None
+        if args.resolvers is not None:
+            nameservers = read_domains_file(args.resolvers) if exists(args.resolvers) == True else args.resolvers.split(',')
+        try:
+            resolver = DnsResolver(nameservers, concurrency=args.dns_concurrency, timeout=args.dns_timeout)
+        except ValueError:
+            parser.error(f"invalid resolvers: '{args.resolvers}'")
+
+    # open the responses cache, which would hide the exchanges from the recorder
+    cache = None
+    if args.no_cache == False and recorder is None:
+        cache = ResponseCache(args.cache_dir, ttl=args.cache_ttl, max_size=args.cache_size * 1000000)
+
+    # create the subenum object
     verbose = True if args.quiet == False else False
-    subenum = SubEnum(
-        verbose=verbose,
-        vt_api_key=vt_api_key,
-        shodan_api_key=shodan_api_key,
-        censys_appid=censys_appid,
-        censys_secret=censys_secret,
-        fast=args.fast
-    )
-    subdomains = subenum.get_subdomains(args.domain)
-
-    # print the subdomains is there is no output
-    if args.output is None:
-        for subdomain in subdomains:
-            print(subdomain)
-    
-    # dump the subdomains list to the output file
-    else:
-        with open(args.output, 'w') as output_file:
+    import_dependencies()
+    try:
+        return SubEnum(
+            verbose=verbose,
+            vt_api_key=vt_api_key,
+            shodan_api_key=shodan_api_key,
+            censys_appid=censys_appid,
+            censys_secret=censys_secret,
+            fast=args.fast,
+            max_workers=args.workers,
+            cache=cache,
+            html_parser=args.html_parser,
+            rate_limits=rate_limits,
+            retry_policy=RetryPolicy(retries=args.retries, backoff=args.retry_backoff),
+            deadline=args.deadline,
+            module_timeout=module_timeout,
+            module_timeouts=module_timeouts,
+            request_timeout=args.timeout,
+            connection_pool=connection_pool,
+            pages_fanout=args.pages_fanout,
+            exclude_expired=args.exclude_expired,
+            recorder=recorder,
+            tracer=tracer,
+            resolver=resolver,
+            parse_processes=args.parse_processes,
+            compact_results=args.compact
+        )
+    except FeatureNotFound:
+        parser.error(f"the '{args.html_parser}' html parser is not installed")
+
+
+# output the subdomains once all the modules are done
+def output_subdomains(subenum, domains, writer, use_asyncio=False):
+
+    # get all the subdomains before the output, with their sources and their records if they are resolved
+    try:
+        if use_asyncio == True:
+            results = asyncio.run(subenum.aget_subdomains_many(domains, with_sources=True))
+        else:
+            results = subenum.get_subdomains_many(domains, with_sources=True)
+
+        # write the subdomains of each domain
+        for domain, subdomains in results.items():
             for subdomain in subdomains:
-                output_file.write(subdomain + '\n')
+                writer.write_record(domain, subdomain)
+            results[domain] = [subdomain['name'] for subdomain in subdomains]
+    finally:
+        writer.close()
+
+    # return the subdomains of each domain
+    return results
+
+
+# write the candidates derived from the subdomains of each domain in a text file
+def output_permutations(results, filename, words_filename, verbose):
+    words = read_domains_file(words_filename) if words_filename is not None else None
+    generator = PermutationGenerator(words=words)
+    candidates_count = 0
+    with open(filename, 'w') as output_file:
+        for domain, subdomains in results.items():
+            for candidate in generator.iter_permutations(domain, subdomains):
+                output_file.write(candidate + '\n')
+                candidates_count += 1
+    if verbose == True:
+        print(f"[*] Saved {candidates_count} permutations in '{filename}'.", file=sys.stderr)
+
+
+# output the subdomains as soon as they are found
+def output_subdomains_stream(subenum, domains, writer):
+    try:
+        for domain, subdomain in subenum.iter_subdomains_many(domains, with_sources=True):
+            writer.write_record(domain, subdomain)
+    finally:
+        writer.close()
+
+
+# output the subdomains as soon as they are found by the asyncio engine
+async def aoutput_subdomains_stream(subenum, domains, writer):
+    try:
+        async for domain, subdomain in subenum.aiter_subdomains_many(domains, with_sources=True):
+            writer.write_record(domain, subdomain)
+    finally:
+        writer.close()
+
+
+# output the subdomains added or removed since a baseline file
+def output_baseline_changes(subenum, domains, baseline_filename, output_filename, stop_early, update_baseline):
+
+    # split the baseline subdomains between the domains, a missing baseline is created empty by the first scan
+    baseline = read_domains_file(baseline_filename) if exists(baseline_filename) == True else []
+    baselines = {}
+    for domain in domains:
+        baselines[domain] = [subdomain for subdomain in baseline if subdomain.endswith('.' + domain) == True]
+
+    # get the changes of each domain
+    changes = subenum.get_subdomains_changes_many(baselines, stop_early=stop_early)
+    lines = []
+    for domain_changes in changes.values():
+        lines += ['+' + subdomain for subdomain in domain_changes['added']]
+        lines += ['-' + subdomain for subdomain in domain_changes['removed']]
+
+    # print the changes if there is no output
+    if output_filename is None:
+        for line in lines:
+            print(line)
+
+    # dump the changes to the output file
+    else:
+        with open(output_filename, 'w') as output_file:
+            for line in lines:
+                output_file.write(line + '\n')
+
+    # save the current subdomains as the new baseline
+    if update_baseline == True:
+        subdomains = set(baseline)
+        for domain_changes in changes.values():
+            subdomains.update(domain_changes['added'])
+            subdomains.difference_update(domain_changes['removed'])
+        with open(baseline_filename, 'w') as baseline_file:
+            for subdomain in sorted(subdomains, key=get_subdomain_sort_key):
+                baseline_file.write(subdomain + '\n')
+
+
+# format a subdomain with its dns records, as 'name A=ip,ip AAAA=ip CNAME=name'
+def format_records(subdomain, records):
+    fields = [subdomain]
+    for record_type in ['a', 'aaaa', 'cname']:
+        if len(records[record_type]) > 0:
+            fields.append(f"{record_type.upper()}={','.join(records[record_type])}")
+    return ' '.join(fields)
+
+
+# parse a 'Module=requests[/seconds]' rate limit
+def parse_rate_limit(text):
+    module, rate = text.split('=')
+    requests_count, _, seconds = rate.partition('/')
+    rate = float(requests_count) / (float(seconds) if seconds != '' else 1)
+    if rate <= 0:
+        raise ValueError("rate limit must be positive")
+    return { module.strip(): rate }
+
+
+# read a list of domains from a text file
+def read_domains_file(filename):
+    domains = SubdomainsCollector()
+    with open(filename, 'r') as input_file:
+        for line in input_file:
+            domain = line.strip()
+            if domain == '' or domain.startswith('#') == True:
+                continue
+            domains.add(domain)
+    return domains.get_subdomains()
+
+
+# compile the pattern of the lines holding a subdomain of a domain, prefixed by wildcards or dots, followed by a trailing dot, keeping the patterns of the last domains scanned
+@lru_cache(maxsize=1024)
+def compile_subdomains_regex(domain):
+    return re.compile(rf'^[ \t\r]*(?:\*?\.)*((?:[a-z0-9-]{{1,63}}\.)+{re.escape(domain)})\.?[ \t\r]*$', re.MULTILINE)
+
+
+# get the key sorting the subdomains label by label from the right, joined by a character lower than any label character to compare like lists of labels
+def get_subdomain_sort_key(subdomain):
+    return '\x00'.join(subdomain.split('.')[::-1])
 
 
 # SubEnum controller
 class SubEnum():
 
+    html_parsers = ['html.parser', 'lxml']
+
     # create a subenum object
-    def __init__(self, verbose=True, vt_api_key=None, shodan_api_key=None, censys_appid=None, censys_secret=None, fast=False):
+    def __init__(self, verbose=True, vt_api_key=None, shodan_api_key=None, censys_appid=None, censys_secret=None, fast=False, max_workers=None, cache=None, html_parser='html.parser', rate_limits=None, retry_policy=None, deadline=None, module_timeout=None, module_timeouts=None, request_timeout=None, connection_pool=None, pages_fanout=None, exclude_expired=False, recorder=None, tracer=None, resolver=None, parse_processes=None, compact_results=False):
         self.verbose = verbose
 
+        # check that the html parser is installed
+        if html_parser not in self.html_parsers:
+            raise ValueError(f"unsupported html parser: '{html_parser}'")
+        if html_parser != 'html.parser':
+            import_dependencies()
+            BeautifulSoup("", features=html_parser)
+
+        # keep the options of the modules, which are only created when they are first used
+        self.vt_api_key = vt_api_key
+        self.shodan_api_key = shodan_api_key
+        self.censys_appid = censys_appid
+        self.censys_secret = censys_secret
+        self.fast = fast
+        self.cache = cache
+        self.html_parser = html_parser
+        self.rate_limits = rate_limits
+        self.retry_policy = retry_policy
+        self.request_timeout = request_timeout
+        self.connection_pool = connection_pool
+        self.pages_fanout = pages_fanout
+        self.exclude_expired = exclude_expired
+        self.recorder = recorder
+        self.tracer = tracer
+        self.resolver = resolver
+        self.compact_results = compact_results
+        self.loaded_modules = None
+        self.modules_lock = Lock()
+
+        # set the time limits of the scans
+        self.deadline = deadline
+        self.module_timeout = module_timeout
+        self.module_timeouts = module_timeouts if module_timeouts is not None else {}
+        self.last_stats = None
+
+        # set the size of the worker pool shared by all the modules, one worker per module by default
+        self.max_workers = max_workers
+
+        # parse the responses of the cpu bound modules in worker processes, started at their first parse
+        self.parse_executor = None
+        if parse_processes is not None:
+            from concurrent.futures import ProcessPoolExecutor
+            from multiprocessing import get_context
+            self.parse_executor = ProcessPoolExecutor(max_workers=parse_processes, mp_context=get_context('spawn'))
+
+    # get the modules, created at their first use
+    @property
+    def modules(self):
+        with self.modules_lock:
+            if self.loaded_modules is None:
+                self.loaded_modules = self.create_modules()
+        return self.loaded_modules
+
+    # replace the modules used by the scans
+    @modules.setter
+    def modules(self, modules):
+        with self.modules_lock:
+            self.loaded_modules = modules
+
+    # create all the modules with the options of the scans
+    def create_modules(self):
+        verbose = self.verbose
+        fast = self.fast
+
         # load all the modules
-        self.modules = []
-        self.modules.append(ThreatCrowd(verbose=verbose))
-        self.modules.append(CertificatesSearch(verbose=verbose))
-        self.modules.append(DNSDumpster(verbose=verbose))
-        self.modules.append(Google(verbose=verbose, fast=fast))
-        self.modules.append(Bing(verbose=verbose, fast=fast))
-        self.modules.append(Yahoo(verbose=verbose, fast=fast))
-        self.modules.append(MerkleMap(verbose=verbose))
+        modules = []
+        modules.append(ThreatCrowd(verbose=verbose))
+        modules.append(CertificatesSearch(verbose=verbose, exclude_expired=self.exclude_expired))
+        modules.append(DNSDumpster(verbose=verbose))
+        modules.append(Google(verbose=verbose, fast=fast))
+        modules.append(Bing(verbose=verbose, fast=fast))
+        modules.append(Yahoo(verbose=verbose, fast=fast))
+        modules.append(MerkleMap(verbose=verbose))
 
         # load all the modules that needs api keys
-        if vt_api_key is not None:
-            self.modules.append(VirusTotal(vt_api_key, verbose=verbose, fast=fast))
-        if shodan_api_key is not None:
-            self.modules.append(Shodan(shodan_api_key, verbose=verbose))
-        if censys_appid is not None and censys_secret is not None:
-            self.modules.append(Censys(censys_appid, censys_secret, verbose=verbose))
+        if self.vt_api_key is not None:
+            modules.append(VirusTotal(self.vt_api_key, verbose=verbose, fast=fast))
+        if self.shodan_api_key is not None:
+            modules.append(Shodan(self.shodan_api_key, verbose=verbose))
+        if self.censys_appid is not None and self.censys_secret is not None:
+            modules.append(Censys(self.censys_appid, self.censys_secret, verbose=verbose, fast=fast))
+
+        # share the responses cache, the html parser, the timeline and the parsing processes with all the modules
+        for module in modules:
+            module.cache = self.cache
+            module.html_parser = self.html_parser
+            module.tracer = self.tracer
+            module.parse_executor = self.parse_executor
+
+        # send the requests of all the modules through the same connections
+        if self.connection_pool is not None:
+            for module in modules:
+                self.connection_pool.mount(module.session)
+
+        # record the exchanges of all the modules, or replay them without waiting for the rate limits if unpaced
+        if self.recorder is not None:
+            for module in modules:
+                self.recorder.mount(module.session)
+                if self.recorder.is_unpaced() == True:
+                    module.rate_limiter = RateLimiter()
+
+        # share the retry policy with all the modules
+        if self.retry_policy is not None:
+            for module in modules:
+                module.retry_policy = self.retry_policy
+
+        # override the default rate limits of the modules
+        if self.rate_limits is not None:
+            for module in modules:
+                if module.base_name in self.rate_limits:
+                    module.rate_limiter = RateLimiter(self.rate_limits[module.base_name], burst=module.rate_burst)
+
+        # set the timeout of the requests of all the modules
+        if self.request_timeout is not None:
+            for module in modules:
+                module.request_timeout = self.request_timeout
+
+        # set the number of pages downloaded at the same time by the search engines
+        if self.pages_fanout is not None:
+            for module in modules:
+                module.pages_fanout = self.pages_fanout
+        return modules
+
+    # get the number of modules running at the same time
+    def get_max_workers(self):
+        max_workers = self.max_workers if self.max_workers is not None else len(self.modules)
+        return max(max_workers, 1)
 
     # get a list of subdomains
-    def get_subdomains(self, domain):
+    def get_subdomains(self, domain, with_sources=False):
+        return self.get_subdomains_many([domain], with_sources=with_sources)[domain]
+
+    # get a list of subdomains for each domain of a list, with the metrics of the scan kept in its context if given
+    def get_subdomains_many(self, domains, with_sources=False, context=None):
+
+        # get the subdomains from all the modules
+        start_time = time()
+        context = context if context is not None else ScanContext()
+        results = self.run_modules_scan(domains, context=context)
+        records = self.resolve_results(results, context)
+        return self.finish_scan(results, start_time, context, with_sources=with_sources, records=records)
+
+    # get a list of subdomains asynchronously
+    async def aget_subdomains(self, domain, with_sources=False):
+        results = await self.aget_subdomains_many([domain], with_sources=with_sources)
+        return results[domain]
+
+    # get a list of subdomains for each domain of a list asynchronously, with the metrics of the scan kept in its context if given
+    async def aget_subdomains_many(self, domains, with_sources=False, context=None):
+
+        # get the subdomains from all the modules
+        start_time = time()
+        context = context if context is not None else ScanContext()
+        results = await self.arun_modules_scan(domains, context=context)
+        records = await self.aresolve_results(results, context)
+        return self.finish_scan(results, start_time, context, with_sources=with_sources, records=records)
+
+    # get the subdomains added and removed since a previous scan of a domain
+    def get_subdomains_changes(self, domain, baseline, stop_early=False):
+        return self.get_subdomains_changes_many({domain: baseline}, stop_early=stop_early)[domain]
+
+    # get the subdomains added and removed since a previous scan of each domain
+    def get_subdomains_changes_many(self, baselines, stop_early=False):
+
+        # stop paginating a source when a page only contains known subdomains
+        baselines = {domain: set(baseline) for domain, baseline in baselines.items()}
+        callbacks = {}
+        if stop_early == True:
+            for domain, baseline in baselines.items():
+                callbacks[domain] = lambda module, subdomains, baseline=baseline: any(subdomain not in baseline for subdomain in subdomains)
 
         # get the subdomains from all the modules
         start_time = time()
-        subdomains = self.run_modules_scan(domain)
-        elapsed_time = "%0.2f" % (time() - start_time)
+        context = ScanContext()
+        results = self.run_modules_scan(list(baselines), callbacks=callbacks, context=context)
+        records = self.resolve_results(results, context)
+        results = self.finish_scan(results, start_time, context, records=records)
+
+        # compare the subdomains with the baselines, skipped pages make the removals unknown
+        changes = {}
+        for domain, subdomains in results.items():
+            baseline = baselines[domain]
+            added = [subdomain for subdomain in subdomains if subdomain not in baseline]
+            removed = []
+            if stop_early == False:
+                subdomains = set(subdomains)
+                removed = sorted((subdomain for subdomain in baseline if subdomain not in subdomains), key=get_subdomain_sort_key)
+            changes[domain] = {'added': added, 'removed': removed}
+
+        # print the number of changes found
+        if self.verbose == True:
+            added_count = sum(len(domain_changes['added']) for domain_changes in changes.values())
+            removed_count = sum(len(domain_changes['removed']) for domain_changes in changes.values())
+            print(f"[*] Found {added_count} new and {removed_count} removed subdomains since the baseline.", file=sys.stderr)
 
-        # sort all the subdomains
-        subdomains = self.sort_subdomains(subdomains)
+        # return the changes of each domain
+        return changes
+
+    # yield each new subdomain of a domain as soon as a module finds it
+    def iter_subdomains(self, domain):
+        for _, subdomain in self.iter_subdomains_many([domain]):
+            yield subdomain
+
+    # yield each new (domain, subdomain) pair as soon as a module finds it, the subdomain with its first source and time if needed
+    def iter_subdomains_many(self, domains, with_sources=False, context=None):
+
+        # collect the pages parsed by the modules in a queue
+        start_time = time()
+        context = context if context is not None else ScanContext()
+        pages = Queue()
+        results = {domain: self.create_collector() for domain in domains}
+        scans = self.create_scans(domains, context)
+        for scan in scans:
+            scan.callback = lambda module, subdomains, scan=scan: pages.put((scan, subdomains))
+        def run_scan(scan):
+            try:
+                subdomains = self.run_scan(scan)
+                if subdomains is not None:
+                    pages.put((scan, subdomains))
+            finally:
+                pages.put((scan, None))
+
+        # run every (domain, module) pair in the same worker pool
+        executor = DaemonThreadPool(self.get_max_workers())
+        try:
+            for scan in scans:
+                executor.submit(run_scan, scan)
+
+            # yield the new subdomains until all the modules are done or timed out
+            running_scans = set(scans)
+            while len(running_scans) > 0:
+                try:
+                    scan, subdomains = pages.get(timeout=self.get_wait_time(running_scans))
+                except Empty:
+                    scan, subdomains = None, None
+                if scan is not None and subdomains is None:
+                    running_scans.discard(scan)
+                elif scan is not None:
+                    seen_time = time()
+                    for subdomain in subdomains:
+                        if results[scan.domain].add(subdomain, source=scan.module.base_name, seen_time=seen_time) == True and self.is_valid_subdomain(subdomain) == True:
+                            yield scan.domain, subdomain if with_sources == False else {'name': subdomain, 'sources': [scan.module.base_name], 'first_seen': seen_time}
+                running_scans.difference_update(self.stop_expired_scans(running_scans))
+
+        # stop the remaining modules if the caller stops iterating
+        finally:
+            for scan in scans:
+                scan.stop()
+            executor.shutdown()
+
+        # print the number of subdomains found
+        self.finish_scan(results, start_time, context)
+
+    # yield the candidates derived from the subdomains of a domain, scanning it if no subdomains are given
+    def iter_permutations(self, domain, subdomains=None, generator=None):
+        if subdomains is None:
+            subdomains = self.get_subdomains(domain)
+        generator = generator if generator is not None else PermutationGenerator()
+        for candidate in generator.iter_permutations(domain, subdomains):
+            yield candidate
+
+    # yield each new subdomain of a domain as soon as a module finds it asynchronously
+    async def aiter_subdomains(self, domain):
+        async for _, subdomain in self.aiter_subdomains_many([domain]):
+            yield subdomain
+
+    # yield each new (domain, subdomain) pair as soon as a module finds it asynchronously, the subdomain with its first source and time if needed
+    async def aiter_subdomains_many(self, domains, with_sources=False, context=None):
+
+        # collect the pages parsed by the modules in a queue
+        start_time = time()
+        context = context if context is not None else ScanContext()
+        pages = asyncio.Queue()
+        results = {domain: self.create_collector() for domain in domains}
+        scans = self.create_scans(domains, context)
+        for scan in scans:
+            scan.callback = lambda module, subdomains, scan=scan: pages.put_nowait((scan, subdomains))
+        async def run_scan(scan, session, semaphore):
+            try:
+                subdomains = await self.arun_scan(scan, session, semaphore)
+                if subdomains is not None:
+                    pages.put_nowait((scan, subdomains))
+            finally:
+                pages.put_nowait((scan, None))
+
+        # run every (domain, module) pair as a task of the event loop
+        async with self.open_async_session() as session:
+            semaphore = self.get_async_semaphore()
+            tasks = [asyncio.ensure_future(run_scan(scan, session, semaphore)) for scan in scans]
+            try:
+
+                # yield the new subdomains until all the modules are done or timed out
+                running_count = len(scans)
+                while running_count > 0:
+                    scan, subdomains = await pages.get()
+                    if subdomains is None:
+                        running_count -= 1
+                        continue
+                    seen_time = time()
+                    for subdomain in subdomains:
+                        if results[scan.domain].add(subdomain, source=scan.module.base_name, seen_time=seen_time) == True and self.is_valid_subdomain(subdomain) == True:
+                            yield scan.domain, subdomain if with_sources == False else {'name': subdomain, 'sources': [scan.module.base_name], 'first_seen': seen_time}
+
+            # stop the remaining modules if the caller stops iterating
+            finally:
+                for scan in scans:
+                    scan.stop()
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        # print the number of subdomains found
+        self.finish_scan(results, start_time, context)
+
+    # sort the results of a scan and print a summary
+    def finish_scan(self, results, start_time, context, with_sources=False, records=None):
+        elapsed_time = time() - start_time
+
+        # sort all the subdomains and add the modules that found them if needed
+        names_counts = {module.base_name: 0 for module in self.modules}
+        unique_names_counts = {module.base_name: 0 for module in self.modules}
+        for domain, collector in results.items():
+            subdomains = self.sort_subdomains(collector.get_subdomains())
+            if records is not None:
+                subdomains = [subdomain for subdomain in subdomains if subdomain in records]
+            for subdomain in subdomains:
+                sources = collector.get_sources(subdomain)
+                for source in sources:
+                    names_counts[source] = names_counts.get(source, 0) + 1
+                    if len(sources) == 1:
+                        unique_names_counts[source] = unique_names_counts.get(source, 0) + 1
+            if with_sources == True and records is not None:
+                subdomains = [{'name': subdomain, 'sources': collector.get_sources(subdomain), 'first_seen': collector.get_first_seen(subdomain), 'records': records[subdomain]} for subdomain in subdomains]
+            elif with_sources == True:
+                subdomains = [{'name': subdomain, 'sources': collector.get_sources(subdomain), 'first_seen': collector.get_first_seen(subdomain)} for subdomain in subdomains]
+            results[domain] = subdomains
+        subdomains_count = sum(len(subdomains) for subdomains in results.values())
+
+        # keep the metrics of the scan and of each module in the context of the scan, and as the last metrics
+        stats = {
+            'elapsed_time': round(elapsed_time, 3),
+            'domains': len(results),
+            'subdomains': subdomains_count,
+            'modules': {},
+        }
+        for module in self.modules:
+            module_stats = context.get_module_stats(module).get_results(names_counts[module.base_name], unique_names_counts[module.base_name])
+            module_stats['timed_out'] = context.get_timed_out_count(module)
+            stats['modules'][module.base_name] = module_stats
+        if records is not None:
+            stats['resolve'] = context.resolve_stats
+        context.stats = stats
+        self.last_stats = stats
 
         # print the number of subdomains found
         if self.verbose == True:
-            print(f"[*] Found a total of {len(subdomains)} subdomains in {elapsed_time} secs.")
+            domains_text = f" on {len(results)} domains" if len(results) > 1 else ""
+            print(f"[*] Found a total of {subdomains_count} subdomains{domains_text} in {elapsed_time:0.2f} secs.", file=sys.stderr)
 
-        # return all the subdomains
-        return subdomains
+            # print the modules that lost time retrying their requests
+            for module in self.modules:
+                module_stats = context.get_module_stats(module)
+                if module_stats.retries_count > 0:
+                    module.print(f"retried {module_stats.retries_count} request{'s' if module_stats.retries_count != 1 else ''} and waited {module_stats.retries_time:0.2f} secs.")
+
+        # return all the subdomains of each domain
+        return results
     
-    # run all the modules to scan for subdomains
-    def run_modules_scan(self, domain):
+    # resolve the subdomains found, return the records of the live ones, or None without a resolver
+    def resolve_results(self, results, context):
+        if self.resolver is None:
+            return None
+        return asyncio.run(self.aresolve_results(results, context))
 
-        # create a list of all the subdomains found
-        subdomains = []
+    # resolve the subdomains found asynchronously, return the records of the live ones, or None without a resolver
+    async def aresolve_results(self, results, context):
+        if self.resolver is None:
+            return None
+        start_time = time()
+        queries_count = self.resolver.queries_count
+        subdomains = self.get_valid_subdomains(results)
+        records = await self.resolver.aresolve_many(subdomains)
+        self.finish_resolve(subdomains, records, start_time, queries_count, context)
+        return records
+
+    # get the valid subdomains of all the domains of the scan results
+    def get_valid_subdomains(self, results):
+        subdomains = self.create_collector()
+        for collector in results.values():
+            subdomains.update(subdomain for subdomain in collector if self.is_valid_subdomain(subdomain) == True)
+        return subdomains.get_subdomains()
+
+    # keep the metrics of the resolution of the subdomains
+    def finish_resolve(self, subdomains, records, start_time, queries_count, context):
+        elapsed_time = time() - start_time
+        context.resolve_stats = {
+            'names': len(subdomains),
+            'live': len(records),
+            'queries': self.resolver.queries_count - queries_count,
+            'time': round(elapsed_time, 3),
+        }
+        if self.tracer is not None:
+            self.tracer.add_span('resolve', 'scan', start_time, args=context.resolve_stats)
+        if self.verbose == True:
+            print(f"[*] Resolved {len(records)} live hosts out of {len(subdomains)} subdomains in {elapsed_time:0.2f} secs.", file=sys.stderr)
 
-        # start a thread for each modules
-        threads = []
-        for module in self.modules:
-            thread = Thread(target=module.get_subdomains, args=(domain,))
-            threads.append(thread)
-            thread.start()
+    # run all the modules to scan for subdomains
+    def run_modules_scan(self, domains, callbacks=None, context=None):
 
-        # wait for all the threads to finish
-        for thread in threads:
-            thread.join()
+        # allow a single domain to be scanned
+        if isinstance(domains, str) == True:
+            return self.run_modules_scan([domains], callbacks=callbacks, context=context)[domains]
 
-        # merge all the subdomains list
-        subdomains = []
-        for module in self.modules:
-            if module.subdomains is not None:
-                for subdomain in module.subdomains:
-                    if subdomain not in subdomains:
-                        subdomains.append(subdomain)
+        # run every (domain, module) pair in the same worker pool
+        context = context if context is not None else ScanContext()
+        scans = self.create_scans(domains, context, callbacks=callbacks)
+        executor = DaemonThreadPool(self.get_max_workers())
+        try:
+            futures = {}
+            for scan in scans:
+                futures[executor.submit(self.run_scan, scan)] = scan
+
+            # wait for all the modules to finish or to time out
+            pending = set(futures)
+            while len(pending) > 0:
+                _, pending = wait(pending, timeout=self.get_wait_time([futures[future] for future in pending]), return_when=FIRST_COMPLETED)
+                stopped_scans = self.stop_expired_scans([futures[future] for future in pending])
+                pending = set(future for future in pending if futures[future] not in stopped_scans)
+
+        # do not wait for the modules that timed out, their threads do not delay the exit of the process
+        finally:
+            executor.shutdown()
+
+        # return the subdomains found for each domain
+        return self.merge_scans(domains, scans)
+
+    # run all the modules to scan for subdomains as tasks of the event loop
+    async def arun_modules_scan(self, domains, callbacks=None, context=None):
+
+        # run every (domain, module) pair in the same event loop
+        context = context if context is not None else ScanContext()
+        scans = self.create_scans(domains, context, callbacks=callbacks)
+        async with self.open_async_session() as session:
+            semaphore = self.get_async_semaphore()
+            tasks = [asyncio.ensure_future(self.arun_scan(scan, session, semaphore)) for scan in scans]
+            try:
+                await asyncio.gather(*tasks)
+
+            # stop the modules if the scan is cancelled
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        # return the subdomains found for each domain
+        return self.merge_scans(domains, scans)
+
+    # open the http session shared by the modules during an asynchronous scan, with the connections limits of the sync engine
+    def open_async_session(self):
+        import_async_dependencies()
+        if self.recorder is not None:
+            raise ValueError("the http exchanges can only be recorded or replayed by the sync scans")
+        connection_pool = self.connection_pool if self.connection_pool is not None else ConnectionPool.get_default()
+        connector = aiohttp.TCPConnector(limit=connection_pool.hosts_count * connection_pool.connections_count, limit_per_host=connection_pool.connections_count)
+        return aiohttp.ClientSession(connector=connector)
+
+    # get the semaphore limiting the modules running at the same time in the event loop, all of them by default
+    def get_async_semaphore(self):
+        return asyncio.Semaphore(self.max_workers) if self.max_workers is not None else None
+
+    # run the scan of a module as a task with the http session of the scan, cancelled when it runs out of time
+    async def arun_scan(self, scan, session, semaphore=None):
+        if semaphore is not None:
+            async with semaphore:
+                return await self.arun_scan(scan, session)
+
+        # do not start the scans that ran out of time while they waited for the semaphore
+        if len(self.stop_expired_scans([scan])) > 0 or scan.start() == False:
+            return None
+        token = ModuleApi.current_scan.set(scan)
+        session_token = ModuleApi.async_session.set(session)
+        try:
+            end_time = scan.get_end_time()
+            timeout = max(end_time - time(), 0) if end_time is not None else None
+            try:
+                subdomains = await asyncio.wait_for(self.arun_module_scan(scan.module, scan.domain, callback=scan.report), timeout)
+            except asyncio.TimeoutError:
+                self.stop_scan(scan)
+                subdomains = None
+        finally:
+            ModuleApi.async_session.reset(session_token)
+            ModuleApi.current_scan.reset(token)
+        scan.finish(subdomains)
+        self.trace_scan(scan, subdomains)
+        return subdomains
 
-        # return the subdomains found
+    # create the scans of every (domain, module) pair, sharing the metrics of each module in the context of the scan
+    def create_scans(self, domains, context, callbacks=None):
+        deadline = time() + self.deadline if self.deadline is not None else None
+        scans = []
+        for domain in domains:
+            callback = callbacks.get(domain) if callbacks is not None else None
+            for module in self.modules:
+                timeout = self.module_timeouts.get(module.base_name, self.module_timeout)
+                scans.append(ModuleScan(module, domain, context.get_module_stats(module), timeout=timeout, deadline=deadline, callback=callback))
+        context.scans += scans
+        return scans
+
+    # run the scan of a module, counting its requests and parses in the metrics of the scan
+    def run_scan(self, scan):
+        if scan.start() == False:
+            return None
+        token = ModuleApi.current_scan.set(scan)
+        try:
+            subdomains = self.run_module_scan(scan.module, scan.domain, callback=scan.report)
+        finally:
+            ModuleApi.current_scan.reset(token)
+        scan.finish(subdomains)
+        self.trace_scan(scan, subdomains)
         return subdomains
 
-    # sort a list of subdomains
+    # add the span of a module scan to the timeline
+    def trace_scan(self, scan, subdomains):
+        if self.tracer is not None:
+            args = {'domain': scan.domain, 'subdomains': len(subdomains) if subdomains is not None else None, 'timed_out': scan.stopped}
+            self.tracer.add_span(scan.module.base_name, 'module', scan.started, args=args)
+
+    # get the time to wait before the next scan may time out
+    def get_wait_time(self, scans):
+        end_times = [end_time for end_time in (scan.get_end_time() for scan in scans) if end_time is not None]
+        wait_time = max(min(end_times) - time(), 0) if len(end_times) > 0 else None
+
+        # check regularly the timeouts of the scans that are not started yet
+        if any(scan.started is None and scan.timeout is not None for scan in scans) == True:
+            wait_time = 0.5 if wait_time is None else min(wait_time, 0.5)
+        return wait_time
+
+    # stop the scans that ran out of time and return them
+    def stop_expired_scans(self, scans):
+        now = time()
+        return [scan for scan in scans if scan.is_expired(now) == True and self.stop_scan(scan) == True]
+
+    # stop a scan that ran out of time, keeping the subdomains found so far, return False if it was already done
+    def stop_scan(self, scan):
+        if scan.stop() == False:
+            return False
+        if self.verbose == True:
+            subdomains_count = len(scan.get_subdomains())
+            scan.module.print_error(f"timed out while scanning '{scan.domain}', keeping the {subdomains_count} subdomain{'s' if subdomains_count != 1 else ''} found.")
+        return True
+
+    # run a module to scan for subdomains
+    def run_module_scan(self, module, domain, callback=None):
+        try:
+            return module.get_subdomains(domain, callback=callback)
+        except ScanStopped:
+            return None
+        except RequestException as e:
+            if self.verbose == True:
+                module.print_error(f"request failed while scanning '{domain}': {e.__class__.__name__}.")
+            return None
+        except Exception as e:
+            if self.verbose == True:
+                module.print_error(f"unexpected error while scanning '{domain}': {e}")
+            return None
+
+    # run a module to scan for subdomains asynchronously
+    async def arun_module_scan(self, module, domain, callback=None):
+        try:
+            return await module.aget_subdomains(domain, callback=callback)
+        except ScanStopped:
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if self.verbose == True:
+                module.print_error(f"request failed while scanning '{domain}': {e.__class__.__name__}.")
+            return None
+        except Exception as e:
+            if self.verbose == True:
+                module.print_error(f"unexpected error while scanning '{domain}': {e}")
+            return None
+
+    # create the collector of the subdomains of a domain, compact for the large scans
+    def create_collector(self):
+        return CompactSubdomainsCollector() if self.compact_results == True else SubdomainsCollector()
+
+    # merge the subdomains found by the scans of each domain, including the partial ones
+    def merge_scans(self, domains, scans):
+        start_time = time()
+        results = {domain: self.create_collector() for domain in domains}
+        for scan in scans:
+            for seen_time, page in scan.get_pages():
+                results[scan.domain].update(page, source=scan.module.base_name, seen_time=seen_time)
+            seen_time = scan.finish_time if scan.finish_time is not None else time()
+            results[scan.domain].update(scan.get_subdomains(), source=scan.module.base_name, seen_time=seen_time)
+        if self.tracer is not None:
+            self.tracer.add_span('merge', 'scan', start_time, args={'domains': len(domains), 'scans': len(scans)})
+        return results
+
+    # sort a list of subdomains label by label from the right, so that the hosts of a zone stay together
     def sort_subdomains(self, subdomains):
-        valid_subdomains = []
+        start_time = time()
+        valid_subdomains = sorted((subdomain for subdomain in subdomains if self.is_valid_subdomain(subdomain) == True), key=get_subdomain_sort_key)
+        if self.tracer is not None:
+            self.tracer.add_span('sort_subdomains', 'scan', start_time, args={'subdomains': len(valid_subdomains)})
+        return valid_subdomains
+
+    # check if a subdomain is a valid dns name
+    def is_valid_subdomain(self, subdomain):
+        return ModuleApi.normalizer.is_valid_name(subdomain)
+
+
+# ordered set of subdomains with the modules that reported each of them
+class SubdomainsCollector:
+
+    # create an empty collector
+    def __init__(self):
+        self.sources = {}
+        self.first_seen = {}
+
+    # add a subdomain and return True if it was not known yet, keeping the earliest time it was seen if given
+    def add(self, subdomain, source=None, seen_time=None):
+        if seen_time is not None and seen_time < self.first_seen.get(subdomain, seen_time + 1):
+            self.first_seen[subdomain] = seen_time
+        sources = self.sources.get(subdomain)
+        if sources is None:
+            self.sources[subdomain] = [] if source is None else [source]
+            return True
+        if source is not None and source not in sources:
+            sources.append(source)
+        return False
+
+    # add a list of subdomains and return the number of new ones
+    def update(self, subdomains, source=None, seen_time=None):
+        new_count = 0
+        for subdomain in subdomains:
+            if self.add(subdomain, source=source, seen_time=seen_time) == True:
+                new_count += 1
+        return new_count
+
+    # get the list of subdomains in insertion order
+    def get_subdomains(self):
+        return list(self.sources)
+
+    # get the list of modules that reported a subdomain
+    def get_sources(self, subdomain):
+        return list(self.sources.get(subdomain, []))
+
+    # get the time at which a subdomain was first seen, None if it is unknown
+    def get_first_seen(self, subdomain):
+        return self.first_seen.get(subdomain)
+
+    # get the list of subdomains with their sources
+    def get_results(self):
+        return [{'name': subdomain, 'sources': list(sources)} for subdomain, sources in self.sources.items()]
+
+    def __contains__(self, subdomain):
+        return subdomain in self.sources
+
+    def __iter__(self):
+        return iter(self.sources)
+
+    def __len__(self):
+        return len(self.sources)
+
+
+# compact set of subdomains stored as a trie of their reversed labels, sharing the nodes of their common parents
+class SubdomainsTrie:
+
+    # create a trie holding only the root node
+    def __init__(self, subdomains=None):
+
+        # the labels of the nodes are packed one after another, the nodes are rows of typed arrays
+        self.labels = bytearray()
+        self.label_offsets = array('L', [0, 0])
+        self.parents = array('i', [-1])
+        self.first_children = array('i', [-1])
+        self.next_siblings = array('i', [-1])
+        self.terminals = bytearray(1)
+        self.names_count = 0
+
+        # the children of the nodes are found by their parent and label in an open addressing table
+        self.table = array('i', [-1]) * 1024
+        self.table_count = 0
+        if subdomains is not None:
+            self.update(subdomains)
+
+    # get the labels of a name from the root, as bytes
+    def get_labels(self, name):
+        return [label.encode('utf-8', errors='replace') for label in reversed(name.split('.'))]
+
+    # get the label of a node
+    def get_label(self, node):
+        return bytes(self.labels[self.label_offsets[node]:self.label_offsets[node + 1]])
+
+    # get the child of a node with a label, and the slot of the table where it is or would be
+    def find_child(self, parent, label):
+        table = self.table
+        mask = len(table) - 1
+        slot = hash((parent, label)) & mask
+        while True:
+            node = table[slot]
+            if node == -1:
+                return -1, slot
+            if self.parents[node] == parent and self.labels[self.label_offsets[node]:self.label_offsets[node + 1]] == label:
+                return node, slot
+            slot = (slot + 1) & mask
+
+    # add the child of a node with a label and return it
+    def add_child(self, parent, label, slot):
+        node = len(self.parents)
+        self.labels += label
+        self.label_offsets.append(len(self.labels))
+        self.parents.append(parent)
+        self.first_children.append(-1)
+        self.next_siblings.append(self.first_children[parent])
+        self.first_children[parent] = node
+        self.terminals.append(0)
+        self.table[slot] = node
+        self.table_count += 1
+        if self.table_count * 2 > len(self.table):
+            self.resize_table()
+        return node
+
+    # double the size of the table and insert all the nodes again
+    def resize_table(self):
+        self.table = array('i', [-1]) * (len(self.table) * 2)
+        mask = len(self.table) - 1
+        for node in range(1, len(self.parents)):
+            slot = hash((self.parents[node], self.get_label(node))) & mask
+            while self.table[slot] != -1:
+                slot = (slot + 1) & mask
+            self.table[slot] = node
+
+    # get the node of a name, or -1 if it is not in the trie
+    def find_node(self, name):
+        node = 0
+        for label in self.get_labels(name):
+            node, _ = self.find_child(node, label)
+            if node == -1:
+                return -1
+        return node
+
+    # get the node of a name, adding the nodes of its missing labels
+    def add_node(self, name):
+        node = 0
+        for label in self.get_labels(name):
+            child, slot = self.find_child(node, label)
+            node = child if child != -1 else self.add_child(node, label, slot)
+        return node
+
+    # mark a node as a subdomain and return True if it was not known yet
+    def add_terminal(self, node):
+        if self.terminals[node] == 1:
+            return False
+        self.terminals[node] = 1
+        self.names_count += 1
+        return True
+
+    # add a subdomain and return True if it was not known yet
+    def add(self, subdomain):
+        return self.add_terminal(self.add_node(subdomain))
+
+    # add a list of subdomains and return the number of new ones
+    def update(self, subdomains):
+        new_count = 0
+        for subdomain in subdomains:
+            if self.add(subdomain) == True:
+                new_count += 1
+        return new_count
+
+    # yield the subdomains under a domain, the domain included, sorted label by label from the right
+    def iter_subdomains(self, domain=None):
+        node = self.find_node(domain) if domain is not None else 0
+        if node == -1:
+            return
+
+        # walk the nodes depth first, visiting the children of each node in the order of their labels
+        stack = [(node, domain)]
+        while len(stack) > 0:
+            node, name = stack.pop()
+            if self.terminals[node] == 1:
+                yield name
+            children = []
+            child = self.first_children[node]
+            while child != -1:
+                children.append((self.get_label(child), child))
+                child = self.next_siblings[child]
+            children.sort(reverse=True)
+            for label, child in children:
+                label = label.decode('utf-8', errors='replace')
+                stack.append((child, f"{label}.{name}" if name is not None else label))
+
+    # count the subdomains under a domain, the domain included
+    def count_subdomains(self, domain=None):
+        node = self.find_node(domain) if domain is not None else 0
+        if node == -1:
+            return 0
+        subdomains_count = 0
+        stack = [node]
+        while len(stack) > 0:
+            node = stack.pop()
+            subdomains_count += self.terminals[node]
+            child = self.first_children[node]
+            while child != -1:
+                stack.append(child)
+                child = self.next_siblings[child]
+        return subdomains_count
+
+    # get the size of the trie in bytes
+    def get_size(self):
+        arrays = [self.label_offsets, self.parents, self.first_children, self.next_siblings, self.table]
+        return len(self.labels) + len(self.terminals) + sum(len(values) * values.itemsize for values in arrays)
+
+    def __contains__(self, subdomain):
+        node = self.find_node(subdomain)
+        return node != -1 and self.terminals[node] == 1
+
+    def __iter__(self):
+        return self.iter_subdomains()
+
+    def __len__(self):
+        return self.names_count
+
+
+# collector of the subdomains of large scans, storing the names in a trie and the sources and first seen times of each node in typed arrays
+class CompactSubdomainsCollector:
+
+    # maximum number of sources, kept as the bits of a mask
+    max_sources = 64
+
+    # create an empty collector
+    def __init__(self):
+        self.trie = SubdomainsTrie()
+        self.source_names = []
+        self.source_bits = {}
+        self.source_masks = array('Q', [0])
+        self.first_seen = array('d', [math.inf])
+
+    # get the bit of a source, registering it at its first use
+    def get_source_bit(self, source):
+        bit = self.source_bits.get(source)
+        if bit is None:
+            if len(self.source_names) >= self.max_sources:
+                raise ValueError(f"a compact collector holds at most {self.max_sources} sources")
+            bit = 1 << len(self.source_names)
+            self.source_bits[source] = bit
+            self.source_names.append(source)
+        return bit
+
+    # add a subdomain and return True if it was not known yet, keeping the earliest time it was seen if given
+    def add(self, subdomain, source=None, seen_time=None):
+        node = self.trie.add_node(subdomain)
+
+        # grow the arrays of the nodes to the nodes added by the trie
+        missing_count = len(self.trie.parents) - len(self.source_masks)
+        if missing_count > 0:
+            self.source_masks.extend(array('Q', [0]) * missing_count)
+            self.first_seen.extend(array('d', [math.inf]) * missing_count)
+        if seen_time is not None and seen_time < self.first_seen[node]:
+            self.first_seen[node] = seen_time
+        if source is not None:
+            self.source_masks[node] |= self.get_source_bit(source)
+        return self.trie.add_terminal(node)
+
+    # add a list of subdomains and return the number of new ones
+    def update(self, subdomains, source=None, seen_time=None):
+        new_count = 0
         for subdomain in subdomains:
-            if all((char.isalnum() or char in ['-', '.']) for char in subdomain) == True:
-                valid_subdomains.append(subdomain)
+            if self.add(subdomain, source=source, seen_time=seen_time) == True:
+                new_count += 1
+        return new_count
+
+    # get the list of subdomains, sorted label by label from the right
+    def get_subdomains(self):
+        return list(self.trie)
+
+    # yield the subdomains under a domain, the domain included, sorted label by label from the right
+    def iter_subdomains(self, domain=None):
+        return self.trie.iter_subdomains(domain)
+
+    # get the list of modules that reported a subdomain
+    def get_sources(self, subdomain):
+        node = self.trie.find_node(subdomain)
+        if node == -1 or self.trie.terminals[node] == 0:
+            return []
+        mask = self.source_masks[node]
+        return [source for index, source in enumerate(self.source_names) if mask & (1 << index) != 0]
+
+    # get the time at which a subdomain was first seen, None if it is unknown
+    def get_first_seen(self, subdomain):
+        node = self.trie.find_node(subdomain)
+        if node == -1 or self.trie.terminals[node] == 0 or self.first_seen[node] == math.inf:
+            return None
+        return self.first_seen[node]
+
+    # get the list of subdomains with their sources
+    def get_results(self):
+        return [{'name': subdomain, 'sources': self.get_sources(subdomain)} for subdomain in self.trie]
+
+    # get the size of the collector in bytes
+    def get_size(self):
+        return self.trie.get_size() + len(self.source_masks) * self.source_masks.itemsize + len(self.first_seen) * self.first_seen.itemsize
+
+    def __contains__(self, subdomain):
+        return subdomain in self.trie
+
+    def __iter__(self):
+        return iter(self.trie)
+
+    def __len__(self):
+        return len(self.trie)
+
+
+# single cleanup stage of the names found by the modules, validated in batches by compiled patterns
+class SubdomainsNormalizer:
+
+    # a valid dns label, in lower case
+    label_pattern = r'[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?'
+
+    # create a normalizer with the compiled pattern of the valid names
+    def __init__(self):
+        self.valid_name_regex = re.compile(rf'(?:{self.label_pattern}\.)*{self.label_pattern}')
+
+    # get the valid subdomains of a domain, without wildcards, in lower case, without trailing dot, encoded in idna and without duplicates
+    def normalize(self, subdomains, domain):
+        domain = self.normalize_domain(domain)
+
+        # lower all the names at once, only the non ascii ones are encoded one by one
+        text = '\n'.join(subdomains).lower()
+        if text.isascii() == False:
+            names = [name if name.isascii() == True else self.encode_idna(name.strip().lower()) for name in text.split('\n')]
+            text = '\n'.join(name for name in names if name is not None)
+
+        # match all the lines ending with the labels of the domain in a single pass, then drop the labels with dashes at their ends
+        names = self.get_subdomains_regex(domain).findall(text)
+        return [name for name in dict.fromkeys(names) if len(name) <= 253 and name[0] != '-' and name.find('-.') == -1 and name.find('.-') == -1]
+
+    # normalize the name of a domain
+    def normalize_domain(self, domain):
+        domain = domain.strip().lower().rstrip('.')
+        if domain.isascii() == False:
+            domain = self.encode_idna(domain) or domain
+        return domain
+
+    # encode a name with international characters in idna, None if it cannot be encoded
+    def encode_idna(self, name):
+        try:
+            return name.encode('idna').decode('ascii')
+        except UnicodeError:
+            return None
+
+    # get the pattern of the lines holding a subdomain of a domain, the domain itself excluded
+    def get_subdomains_regex(self, domain):
+        return compile_subdomains_regex(domain)
+
+    # check if a normalized name is a valid dns name
+    def is_valid_name(self, name):
+        return len(name) <= 253 and self.valid_name_regex.fullmatch(name) is not None
+
+
+# generator of the candidate subdomains derived from the discovered ones, streamed without keeping them in memory
+class PermutationGenerator:
+
+    default_words = [
+        'admin', 'api', 'app', 'auth', 'beta', 'cdn', 'ci', 'demo', 'dev', 'docs', 'git', 'internal', 'lab', 'm',
+        'mail', 'old', 'portal', 'preprod', 'prod', 'qa', 'sandbox', 'stage', 'staging', 'static', 'test', 'uat',
+        'v1', 'v2', 'vpn', 'web', 'www'
+    ]
+
+    # create a generator inserting words and incrementing numbers, dropping the candidates already seen
+    def __init__(self, words=None, increments=3, capacity=1000000, error_rate=0.001):
+        self.words = list(words) if words is not None else self.default_words
+        self.increments = increments
+        self.seen = SeenFilter(capacity=capacity, error_rate=error_rate)
+
+    # yield the new candidates of the subdomains of a domain
+    def iter_permutations(self, domain, subdomains):
+
+        # the discovered subdomains are not candidates
+        subdomains = [subdomain for subdomain in subdomains if subdomain.endswith('.' + domain) == True]
+        for subdomain in subdomains:
+            self.seen.add(subdomain)
+
+        # yield the words under the domain, then the permutations of each subdomain
+        for candidate in (f"{word}.{domain}" for word in self.words):
+            if self.is_valid_candidate(candidate) == True and self.seen.add(candidate) == True:
+                yield candidate
+        for subdomain in subdomains:
+            labels = subdomain[:-len(domain) - 1].split('.')
+            for candidate_labels in self.iter_labels_permutations(labels):
+                candidate = '.'.join(candidate_labels) + '.' + domain
+                if self.is_valid_candidate(candidate) == True and self.seen.add(candidate) == True:
+                    yield candidate
+
+    # yield the permutations of the labels of a subdomain
+    def iter_labels_permutations(self, labels):
+
+        # the punycode labels are only moved as a whole, changing their characters would break their encoding
+        mutable = [label.startswith('xn--') == False for label in labels]
+
+        # insert each word as a new label, or joined to a label with a dash
+        for word in self.words:
+            for pos in range(len(labels) + 1):
+                yield labels[:pos] + [word] + labels[pos:]
+            for pos, label in enumerate(labels):
+                if mutable[pos] == True:
+                    yield labels[:pos] + [f"{word}-{label}"] + labels[pos + 1:]
+                    yield labels[:pos] + [f"{label}-{word}"] + labels[pos + 1:]
+
+        # increment and decrement the numbers of each label, keeping their padding
+        for pos, label in enumerate(labels):
+            if mutable[pos] == False:
+                continue
+            for match in re.finditer(r'\d+', label):
+                number = int(match.group())
+                width = len(match.group()) if match.group().startswith('0') == True else 0
+                for other_number in range(max(number - self.increments, 0), number + self.increments + 1):
+                    if other_number != number:
+                        yield labels[:pos] + [label[:match.start()] + str(other_number).zfill(width) + label[match.end():]] + labels[pos + 1:]
+
+        # split the labels on their dashes and join the consecutive labels with a dash
+        for pos, label in enumerate(labels):
+            if mutable[pos] == False:
+                continue
+            for match in re.finditer('-', label):
+                yield labels[:pos] + [label[:match.start()], label[match.end():]] + labels[pos + 1:]
+        for pos in range(len(labels) - 1):
+            if mutable[pos] == True and mutable[pos + 1] == True:
+                yield labels[:pos] + [f"{labels[pos]}-{labels[pos + 1]}"] + labels[pos + 2:]
+
+    # check if a candidate is a valid dns name
+    def is_valid_candidate(self, candidate):
+        return len(candidate) <= 253 and all(0 < len(label) <= 63 and label[0] != '-' and label[-1] != '-' for label in candidate.split('.'))
+
+
+# probabilistic set of the names already seen, adding a twice larger bloom filter each time the last one is full
+class SeenFilter:
+
+    # create a filter for a number of names with a total rate of false positives, however many filters are added
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.filters = []
+        self.add_filter(capacity)
+
+    # add a bloom filter sized for a number of names, with half the error rate of the previous one so their sum stays under the total rate
+    def add_filter(self, capacity):
+        error_rate = self.error_rate * 0.5 ** (len(self.filters) + 1)
+        bits_count = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 64)
+        hashes_count = max(round(bits_count / capacity * math.log(2)), 1)
+        self.filters.append({'bits': bytearray((bits_count + 7) // 8), 'bits_count': bits_count, 'hashes_count': hashes_count, 'capacity': capacity, 'count': 0})
+
+    # get the two hashes combined into the positions of the bits of a name
+    def get_hashes(self, name):
+        digest = blake2b(name.encode('utf-8', errors='replace'), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+    # check if all the bits of the hashes of a name are set in a filter
+    def is_in_filter(self, hashes, bloom_filter):
+        first_hash, second_hash = hashes
+        bits, bits_count = bloom_filter['bits'], bloom_filter['bits_count']
+        for index in range(bloom_filter['hashes_count']):
+            pos = (first_hash + index * second_hash) % bits_count
+            if bits[pos >> 3] & (1 << (pos & 7)) == 0:
+                return False
+        return True
+
+    # check if a name was probably seen
+    def __contains__(self, name):
+        hashes = self.get_hashes(name)
+        return any(self.is_in_filter(hashes, bloom_filter) for bloom_filter in self.filters)
+
+    # add a name and return True if it was not seen yet, hashing it only once
+    def add(self, name):
+        hashes = self.get_hashes(name)
+        for bloom_filter in self.filters:
+            if self.is_in_filter(hashes, bloom_filter) == True:
+                return False
+        bloom_filter = self.filters[-1]
+        if bloom_filter['count'] >= bloom_filter['capacity']:
+            self.add_filter(bloom_filter['capacity'] * 2)
+            bloom_filter = self.filters[-1]
+        first_hash, second_hash = hashes
+        bits, bits_count = bloom_filter['bits'], bloom_filter['bits_count']
+        for index in range(bloom_filter['hashes_count']):
+            pos = (first_hash + index * second_hash) % bits_count
+            bits[pos >> 3] |= 1 << (pos & 7)
+        bloom_filter['count'] += 1
+        return True
+
+    # get the number of names added
+    def __len__(self):
+        return sum(bloom_filter['count'] for bloom_filter in self.filters)
+
+    # get the size of the filters in bytes
+    def get_size(self):
+        return sum(len(bloom_filter['bits']) for bloom_filter in self.filters)
+
+
+# buffered writer of the subdomains as text, json lines or csv records, optionally compressed
+class SubdomainsWriter:
+
+    formats = ['txt', 'jsonl', 'csv']
+    compressions = ['gzip', 'zstd']
+    csv_fields = ['domain', 'name', 'sources', 'first_seen', 'a', 'aaaa', 'cname']
+
+    # open an output file, or the standard output, writing the records by blocks of a buffer size
+    def __init__(self, filename=None, output_format='txt', compression=None, buffer_size=1000000, flush=False):
+        if output_format not in self.formats:
+            raise ValueError(f"unknown output format: '{output_format}'")
+        self.output_format = output_format
+        self.buffer_size = buffer_size
+        self.flush_records = flush
+        self.buffer = []
+        self.buffered_size = 0
+        self.output_file = self.open(filename, compression) if filename is not None else None
+        self.csv_writer = csv.writer(self, lineterminator='\n') if output_format == 'csv' else None
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(self.csv_fields)
+
+    # get the compression of an output file from its extension
+    @staticmethod
+    def get_compression(filename):
+        if filename is not None and filename.endswith('.gz') == True:
+            return 'gzip'
+        if filename is not None and filename.endswith('.zst') == True:
+            return 'zstd'
+        return None
+
+    # open a binary output file with a compression
+    def open(self, filename, compression):
+        if compression == 'gzip':
+            return gzip.open(filename, 'wb', compresslevel=6)
+        if compression == 'zstd':
+            import zstandard
+            return zstandard.ZstdCompressor().stream_writer(open(filename, 'wb'), closefd=True)
+        if compression is not None:
+            raise ValueError(f"unknown compression: '{compression}'")
+        return open(filename, 'wb')
+
+    # write a record of a subdomain, as a dict with its name, sources, first seen time and dns records if resolved
+    def write_record(self, domain, record):
+        records = record.get('records')
+        if self.output_format == 'txt':
+            self.write((record['name'] if records is None else format_records(record['name'], records)) + '\n')
+        elif self.output_format == 'jsonl':
+            self.write(json.dumps(self.get_json_record(domain, record)) + '\n')
+        else:
+            fields = [domain, record['name'], ';'.join(record['sources']), self.format_time(record['first_seen'])]
+            fields += [','.join(records[record_type]) if records is not None else '' for record_type in ['a', 'aaaa', 'cname']]
+            self.csv_writer.writerow(fields)
+        if self.flush_records == True:
+            self.flush()
+
+    # get the json record of a subdomain
+    @staticmethod
+    def get_json_record(domain, record):
+        json_record = {'domain': domain, 'name': record['name'], 'sources': record['sources'], 'first_seen': SubdomainsWriter.format_time(record['first_seen'])}
+        if record.get('records') is not None:
+            json_record['records'] = record['records']
+        return json_record
+
+    # format a time in iso 8601, in utc
+    @staticmethod
+    def format_time(seen_time):
+        if seen_time is None:
+            return None
+        return datetime.fromtimestamp(seen_time, timezone.utc).isoformat(timespec='milliseconds')
+
+    # buffer some text, writing the buffer when it is full
+    def write(self, text):
+        self.buffer.append(text)
+        self.buffered_size += len(text)
+        if self.buffered_size >= self.buffer_size:
+            self.flush()
+
+    # write the buffered text
+    def flush(self):
+        if len(self.buffer) == 0:
+            return
+        text = ''.join(self.buffer)
+        self.buffer = []
+        self.buffered_size = 0
+        if self.output_file is None:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        else:
+            self.output_file.write(text.encode('utf-8'))
+            if self.flush_records == True:
+                self.output_file.flush()
+
+    # write the buffered text and close the output file
+    def close(self):
+        self.flush()
+        if self.output_file is not None:
+            self.output_file.close()
+
+
+# local http server running the scan jobs of its clients, keeping the modules, connections and caches warm between the jobs
+class ScanServer:
+
+    default_port = 8750
+
+    # create a server running a number of jobs at the same time with a subenum object
+    def __init__(self, subenum, host='127.0.0.1', port=8750, jobs_count=2, kept_jobs=100):
+        self.subenum = subenum
+        self.jobs_count = max(jobs_count, 1)
+        self.kept_jobs = kept_jobs
+        self.jobs = {}
+        self.last_job_id = 0
+        self.queue = Queue()
+        self.runners = []
+        self.serving_thread = None
+        self.lock = Lock()
+        self.http_server = ThreadingHTTPServer((host, port), ScanRequestHandler)
+        self.http_server.daemon_threads = True
+        self.http_server.scan_server = self
+
+    # load the modules, start the job runners and answer the requests until the server is shut down
+    def serve_forever(self):
+        self.subenum.modules
+        for runner_id in range(self.jobs_count):
+            runner = Thread(target=self.run_jobs, name=f"subenum-job-{runner_id}", daemon=True)
+            runner.start()
+            self.runners.append(runner)
+        self.serving_thread = current_thread()
+        try:
+            self.http_server.serve_forever()
+        finally:
+            self.serving_thread = None
+
+    # stop answering the requests, waiting for the loop of the server when it runs in another thread, and stop the job runners once their current job is done
+    def shutdown(self):
+        serving_thread = self.serving_thread
+        if serving_thread is not None and serving_thread is not current_thread():
+            self.http_server.shutdown()
+        self.http_server.server_close()
+        for _ in self.runners:
+            self.queue.put(None)
+
+    # queue a job scanning a list of domains
+    def submit(self, domains):
+        with self.lock:
+            self.last_job_id += 1
+            job = ScanJob(str(self.last_job_id), domains)
+            self.jobs[job.id] = job
+            self.forget_old_jobs()
+        self.queue.put(job)
+        return job
+
+    # get a job from its id, None if it is unknown
+    def get_job(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    # get the summaries of all the jobs
+    def get_jobs_summaries(self):
+        with self.lock:
+            jobs = list(self.jobs.values())
+        return [job.get_summary() for job in jobs]
+
+    # get the state of the server
+    def get_status(self):
+        with self.lock:
+            jobs = list(self.jobs.values())
+        statuses = {status: 0 for status in ScanJob.statuses}
+        for job in jobs:
+            statuses[job.status] += 1
+        return {'jobs': statuses, 'max_jobs': self.jobs_count, 'modules': [module.base_name for module in self.subenum.modules], 'resolve': self.subenum.resolver is not None}
+
+    # forget the oldest finished jobs when there are too many of them
+    def forget_old_jobs(self):
+        finished_jobs = [job for job in self.jobs.values() if job.is_done() == True]
+        for job in finished_jobs[:max(len(finished_jobs) - self.kept_jobs, 0)]:
+            del self.jobs[job.id]
+
+    # run the queued jobs one after the other
+    def run_jobs(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            if job.start() == True:
+                self.run_job(job)
+
+    # run the scan of a job in its own context, streaming the subdomains as they are found, or once they are resolved
+    def run_job(self, job):
+        try:
+            if self.subenum.resolver is not None:
+                for domain, subdomains in self.subenum.get_subdomains_many(job.domains, with_sources=True, context=job.context).items():
+                    for subdomain in subdomains:
+                        job.add_record(domain, subdomain)
+            else:
+                for domain, subdomain in self.subenum.iter_subdomains_many(job.domains, with_sources=True, context=job.context):
+                    job.add_record(domain, subdomain)
+                    if job.cancelled == True:
+                        break
+            job.finish('cancelled' if job.cancelled == True else 'done')
+        except Exception as e:
+            job.finish('failed', error=str(e))
+
+
+# scan job of the server, keeping the subdomains found for the clients streaming them
+class ScanJob:
+
+    statuses = ['queued', 'running', 'done', 'cancelled', 'failed']
+
+    # create a queued job scanning a list of domains
+    def __init__(self, job_id, domains):
+        self.id = job_id
+        self.domains = domains
+        self.status = 'queued'
+        self.error = None
+        self.cancelled = False
+        self.records = []
+        self.created = time()
+        self.started = None
+        self.finished = None
+        self.context = ScanContext()
+        self.condition = Condition()
+
+    # mark the job as running, return False if it was cancelled while queued
+    def start(self):
+        with self.condition:
+            if self.cancelled == True:
+                return False
+            self.status = 'running'
+            self.started = time()
+            return True
+
+    # add the record of a subdomain and wake up the clients streaming the job
+    def add_record(self, domain, record):
+        with self.condition:
+            self.records.append(SubdomainsWriter.get_json_record(domain, record))
+            self.condition.notify_all()
+
+    # mark the job as done, cancelled or failed
+    def finish(self, status, error=None):
+        with self.condition:
+            self.status = status
+            self.error = error
+            self.finished = time()
+            self.condition.notify_all()
+
+    # cancel the job, a running job stops at the next subdomain found
+    def cancel(self):
+        with self.condition:
+            if self.is_done() == True:
+                return
+            self.cancelled = True
+            if self.status == 'queued':
+                self.status = 'cancelled'
+                self.finished = time()
+            self.condition.notify_all()
+
+    # check if the job will not find any new subdomain
+    def is_done(self):
+        return self.status in ['done', 'cancelled', 'failed']
+
+    # yield the records of the job from a position, waiting for the new ones until the job is done
+    def iter_records(self, pos=0):
+        while True:
+            with self.condition:
+                while pos >= len(self.records) and self.is_done() == False:
+                    self.condition.wait()
+                records = self.records[pos:]
+                done = self.is_done()
+            for record in records:
+                yield record
+            pos += len(records)
+            if done == True and len(records) == 0:
+                return
+
+    # get the state of the job
+    def get_summary(self):
+        with self.condition:
+            return {
+                'id': self.id,
+                'status': self.status,
+                'domains': self.domains,
+                'subdomains': len(self.records),
+                'created': SubdomainsWriter.format_time(self.created),
+                'started': SubdomainsWriter.format_time(self.started),
+                'finished': SubdomainsWriter.format_time(self.finished),
+                'error': self.error,
+                'stats': self.context.stats
+            }
+
+
+# http/json api of the scan server
+#
+#   POST   /scans               {"domains": ["example.com"]} queue a job
+#   GET    /scans               summaries of the jobs
+#   GET    /scans/<id>          summary of a job
+#   GET    /scans/<id>/results  json lines of the subdomains of a job, streamed until it is done (?from=<position>)
+#   DELETE /scans/<id>          cancel a job
+#   GET    /status              jobs counts and modules of the server
+class ScanRequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    # answer a GET request
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        parts = path.strip('/').split('/')
+        scan_server = self.server.scan_server
+        if parts == ['status']:
+            return self.send_json(200, scan_server.get_status())
+        if parts == ['scans']:
+            return self.send_json(200, scan_server.get_jobs_summaries())
+        job = scan_server.get_job(parts[1]) if len(parts) in [2, 3] and parts[0] == 'scans' else None
+        if job is None:
+            return self.send_json(404, {'error': "unknown scan"})
+        if len(parts) == 2:
+            return self.send_json(200, job.get_summary())
+        if parts[2] == 'results':
+            return self.send_records(job, self.get_query_position(query))
+        self.send_json(404, {'error': "unknown scan"})
+
+    # answer a POST request queuing a job
+    def do_POST(self):
+        if self.path.strip('/') != 'scans':
+            return self.send_json(404, {'error': "unknown path"})
+
+        # read the domains of the job
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('content-length', 0))))
+            domains = body.get('domains', [body['domain']] if 'domain' in body else [])
+        except (ValueError, AttributeError, KeyError):
+            return self.send_json(400, {'error': "the body must be a json object with a list of domains"})
+        normalizer = ModuleApi.normalizer
+        if isinstance(domains, list) == False or len(domains) == 0 or any(isinstance(domain, str) == False for domain in domains):
+            return self.send_json(400, {'error': "the body must be a json object with a list of domains"})
+        domains = list(dict.fromkeys(normalizer.normalize_domain(domain) for domain in domains))
+        invalid_domains = [domain for domain in domains if normalizer.is_valid_name(domain) == False]
+        if len(invalid_domains) > 0:
+            return self.send_json(400, {'error': f"invalid domains: {', '.join(invalid_domains)}"})
+
+        # queue the job
+        job = self.server.scan_server.submit(domains)
+        self.send_json(202, job.get_summary(), headers={'Location': f"/scans/{job.id}"})
+
+    # answer a DELETE request cancelling a job
+    def do_DELETE(self):
+        parts = self.path.strip('/').split('/')
+        job = self.server.scan_server.get_job(parts[1]) if len(parts) == 2 and parts[0] == 'scans' else None
+        if job is None:
+            return self.send_json(404, {'error': "unknown scan"})
+        job.cancel()
+        self.send_json(200, job.get_summary())
+
+    # get the position of the first record to send from a query string
+    def get_query_position(self, query):
+        for param in query.split('&'):
+            name, _, value = param.partition('=')
+            if name == 'from' and value.isdigit() == True:
+                return int(value)
+        return 0
+
+    # send a json response
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    # stream the records of a job as json lines in chunks, until the job is done or the client leaves
+    def send_records(self, job, pos):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for record in job.iter_records(pos):
+                line = (json.dumps(record) + '\n').encode('utf-8')
+                self.wfile.write(f"{len(line):x}\r\n".encode('ascii') + line + b'\r\n')
+                self.wfile.flush()
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    # log the requests in verbose mode only
+    def log_message(self, format, *args):
+        if self.server.scan_server.subenum.verbose == True:
+            super().log_message(format, *args)
+
+
+# timeline of the scans as chrome trace events, readable by chrome://tracing or perfetto
+class ScanTracer:
+
+    # create an empty timeline
+    def __init__(self):
+        self.events = []
+        self.threads = set()
+        self.pid = getpid()
+        self.lock = Lock()
+
+    # add a span ending now, or an asynchronous span for the code switching threads
+    def add_span(self, name, category, start_time, end_time=None, args=None, async_id=None):
+        end_time = end_time if end_time is not None else time()
+        thread = current_thread()
+        event = {'name': name, 'cat': category, 'pid': self.pid, 'tid': thread.ident, 'ts': int(start_time * 1000000)}
+        if args is not None:
+            event['args'] = args
+        with self.lock:
+
+            # name the thread the first time it is seen
+            if thread.ident not in self.threads:
+                self.threads.add(thread.ident)
+                self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': thread.ident, 'args': {'name': thread.name}})
+
+            # add a complete event, or the begin and end events of an asynchronous span
+            if async_id is None:
+                self.events.append({**event, 'ph': 'X', 'dur': int((end_time - start_time) * 1000000)})
+            else:
+                self.events.append({**event, 'ph': 'b', 'id': async_id})
+                self.events.append({**event, 'ph': 'e', 'id': async_id, 'ts': int(end_time * 1000000)})
+
+    # save the timeline in a json file
+    def save(self, filename):
+        with self.lock:
+            events = list(self.events)
+        with open(filename, 'w') as trace_file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, trace_file)
+
+
+# state of a scan of a list of domains, kept apart from the other scans running at the same time with the same modules
+class ScanContext:
+
+    # create an empty context
+    def __init__(self):
+        self.scans = []
+        self.modules_stats = {}
+        self.resolve_stats = None
+        self.stats = None
+        self.lock = Lock()
+
+    # get the metrics of a module during the scan
+    def get_module_stats(self, module):
+        with self.lock:
+            if module.base_name not in self.modules_stats:
+                self.modules_stats[module.base_name] = ModuleStats()
+            return self.modules_stats[module.base_name]
+
+    # count the scans of a module that ran out of time
+    def get_timed_out_count(self, module):
+        return sum(1 for scan in self.scans if scan.module is module and scan.stopped == True)
+
+
+# metrics of the requests and the parses of a module during a scan
+class ModuleStats:
+
+    # create empty metrics
+    def __init__(self):
+        self.requests_count = 0
+        self.status_codes = {}
+        self.bytes_count = 0
+        self.network_time = 0
+        self.parse_time = 0
+        self.rate_limit_time = 0
+        self.pages_count = 0
+        self.retries_count = 0
+        self.retries_time = 0
+        self.lock = Lock()
+
+    # count a request with its status code, or the name of its error
+    def count_request(self, status, network_time, bytes_count=0):
+        with self.lock:
+            self.requests_count += 1
+            self.status_codes[str(status)] = self.status_codes.get(str(status), 0) + 1
+            self.network_time += network_time
+            self.bytes_count += bytes_count
+
+    # count the time spent downloading a chunk of a streamed response while parsing it
+    def count_stream(self, network_time, bytes_count):
+        with self.lock:
+            self.network_time += network_time
+            self.parse_time -= network_time
+            self.bytes_count += bytes_count
+
+    # count the parse of a page
+    def count_page(self, parse_time):
+        with self.lock:
+            self.pages_count += 1
+            self.parse_time += parse_time
+
+    # count the time waited for the rate limiter
+    def count_rate_limit(self, wait_time):
+        with self.lock:
+            self.rate_limit_time += wait_time
+
+    # count a retry and the time waited before it
+    def count_retry(self, wait_time):
+        with self.lock:
+            self.retries_count += 1
+            self.retries_time += wait_time
+
+    # get the metrics as a dictionary, with the names found by the module
+    def get_results(self, names_count=0, unique_names_count=0):
+        with self.lock:
+            return {
+                'requests': self.requests_count,
+                'status_codes': dict(self.status_codes),
+                'bytes': self.bytes_count,
+                'network_time': round(self.network_time, 3),
+                'parse_time': round(max(self.parse_time, 0), 3),
+                'rate_limit_time': round(self.rate_limit_time, 3),
+                'pages': self.pages_count,
+                'retries': self.retries_count,
+                'retries_time': round(self.retries_time, 3),
+                'names': names_count,
+                'unique_names': unique_names_count,
+                'duplicate_names': names_count - unique_names_count,
+            }
+
+
+# scan of a domain by a module, collecting the pages until it finishes or runs out of time
+class ModuleScan:
+
+    # create a module scan counting in the metrics of the module, with an optional timeout and deadline
+    def __init__(self, module, domain, stats, timeout=None, deadline=None, callback=None):
+        self.module = module
+        self.domain = domain
+        self.stats = stats
+        self.timeout = timeout
+        self.deadline = deadline
+        self.callback = callback
+        self.started = None
+        self.finished = False
+        self.finish_time = None
+        self.stopped = False
+        self.stop_event = Event()
+        self.pages = []
+        self.subdomains = None
+        self.lock = Lock()
+
+    # mark the scan as started, return False if it was stopped before
+    def start(self):
+        with self.lock:
+            if self.stopped == True:
+                return False
+            self.started = time()
+            return True
+
+    # keep the complete list of subdomains returned by the module
+    def finish(self, subdomains):
+        with self.lock:
+            if self.stopped == False:
+                self.finished = True
+                self.finish_time = time()
+                self.subdomains = subdomains
+
+    # stop the scan and keep the subdomains found so far, return False if it was already done
+    def stop(self):
+        with self.lock:
+            if self.finished == True or self.stopped == True:
+                return False
+            self.stopped = True
+            self.stop_event.set()
+            return True
+
+    # keep a page of subdomains with the time it was found, return False to stop the pagination of the module
+    def report(self, module, subdomains):
+        with self.lock:
+            if self.stopped == True:
+                return False
+            self.pages.append((time(), subdomains))
+        if self.is_expired(time()) == True:
+            return False
+        if self.callback is not None:
+            return self.callback(module, subdomains) != False
+        return True
+
+    # get the time at which the scan runs out of time
+    def get_end_time(self):
+        end_times = []
+        if self.deadline is not None:
+            end_times.append(self.deadline)
+        if self.timeout is not None and self.started is not None:
+            end_times.append(self.started + self.timeout)
+        return min(end_times) if len(end_times) > 0 else None
+
+    # check if the scan ran out of time
+    def is_expired(self, now):
+        end_time = self.get_end_time()
+        return end_time is not None and now >= end_time
+
+    # get the subdomains found by the module, or the ones of the pages reported before it was stopped
+    def get_subdomains(self):
+        with self.lock:
+            if self.subdomains is not None:
+                return self.subdomains
+            subdomains = []
+            for _, page in self.pages:
+                subdomains += page
+            return subdomains
+
+    # get the pages of subdomains reported by the module, with the time they were found
+    def get_pages(self):
+        with self.lock:
+            return list(self.pages)
+
+
+# error raised in a module when its scan is stopped, so that it stops sending requests and waiting
+class ScanStopped(Exception):
+    pass
+
+
+# pool of daemon threads, so that the scans abandoned after their deadline never delay the exit of the process
+class DaemonThreadPool:
+
+    # create a pool of threads started when the tasks are submitted
+    def __init__(self, max_workers, name='subenum'):
+        self.max_workers = max(max_workers, 1)
+        self.name = name
+        self.tasks = Queue()
+        self.threads_count = 0
+        self.idle_threads = Semaphore(0)
+        self.shut_down = False
+        self.lock = Lock()
+
+    # run a function in a thread of the pool and return its future
+    def submit(self, function, *args, **kwargs):
+        future = Future()
+        with self.lock:
+            if self.shut_down == True:
+                raise RuntimeError("cannot submit a task after the shutdown of the pool")
+            self.tasks.put((future, function, args, kwargs))
+            if self.idle_threads.acquire(blocking=False) == False and self.threads_count < self.max_workers:
+                self.threads_count += 1
+                Thread(target=self.run_tasks, name=f"{self.name}-{self.threads_count}", daemon=True).start()
+        return future
+
+    # run the tasks of the pool until it is shut down
+    def run_tasks(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            future, function, args, kwargs = task
+            if future.set_running_or_notify_cancel() == True:
+                try:
+                    future.set_result(function(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+            self.idle_threads.release()
+
+    # cancel the tasks not started yet and stop the threads after their current task, without waiting for them
+    def shutdown(self):
+        with self.lock:
+            self.shut_down = True
+            while True:
+                try:
+                    task = self.tasks.get_nowait()
+                except Empty:
+                    break
+                if task is not None:
+                    task[0].cancel()
+            for _ in range(self.threads_count):
+                self.tasks.put(None)
+
+
+# retries of the requests failing because of the network or a temporary server error
+class RetryPolicy:
+
+    # create a retry policy with an exponential backoff
+    def __init__(self, retries=3, backoff=0.5, max_backoff=30, jitter=True, statuses=(500, 502, 503, 504)):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = statuses
+
+    # get the time to wait before a retry, with a full jitter to spread the retries of concurrent scans
+    def get_wait_time(self, failed_count):
+        wait_time = min(self.max_backoff, self.backoff * (2 ** (failed_count - 1)))
+        if self.jitter == True:
+            wait_time = uniform(0, wait_time)
+        return wait_time
+
+
+# token bucket pacing the requests of a module, adapted to the rate limit responses
+class RateLimiter:
+
+    max_retries = 3
+    max_wait_time = 60
+
+    # create a rate limiter allowing a number of requests per second
+    def __init__(self, rate=None, burst=1):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = time()
+        self.paused_until = 0
+        self.throttled_count = 0
+        self.lock = Lock()
+
+    # wait until a request can be sent, return False if the stop event is set meanwhile
+    def acquire(self, stop_event=None):
+        while True:
+            wait_time = self.try_acquire()
+            if wait_time == 0:
+                return True
+            if stop_event is None:
+                sleep(wait_time)
+            elif stop_event.wait(wait_time) == True:
+                return False
+
+    # wait until a request can be sent without blocking the event loop
+    async def aacquire(self):
+        while True:
+            wait_time = self.try_acquire()
+            if wait_time == 0:
+                return
+            await asyncio.sleep(wait_time)
+
+    # take a token if a request can be sent now, otherwise return the time to wait before trying again
+    def try_acquire(self):
+        with self.lock:
+            now = time()
+            wait_time = self.paused_until - now
+
+            # refill the bucket with the tokens earned since the last request
+            if wait_time <= 0 and self.rate is not None:
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return 0
+                return (1 - self.tokens) / self.rate
+            return max(wait_time, 0)
+
+    # adapt the pace to a response, return the time to wait before a retry if it was throttled
+    def update(self, response):
+
+        # stop sending requests until the quota is reset
+        headers = response.headers
+        remaining = headers.get('x-ratelimit-remaining', headers.get('ratelimit-remaining'))
+        reset = headers.get('x-ratelimit-reset', headers.get('ratelimit-reset'))
+        if remaining is not None and reset is not None and remaining.strip() == '0':
+            self.pause(self.parse_reset_time(reset))
+
+        # slowly go back to the maximum rate after a throttling
+        if response.status_code != 429:
+            with self.lock:
+                if self.rate is not None and self.rate < self.max_rate:
+                    self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+            return None
+
+        # slow down and wait for the time asked by the server, or back off exponentially
+        with self.lock:
+            self.throttled_count += 1
+            if self.rate is not None:
+                self.rate = max(self.rate / 2, self.max_rate / 16)
+            wait_time = 2 ** min(self.throttled_count, 5)
+        retry_after = headers.get('retry-after')
+        if retry_after is not None:
+            wait_time = self.parse_retry_after(retry_after)
+        if wait_time is None or wait_time > self.max_wait_time:
+            return None
+        self.pause(wait_time)
+        return wait_time
+
+    # stop sending requests for a number of seconds
+    def pause(self, wait_time):
+        if wait_time is None:
+            return
+        with self.lock:
+            self.paused_until = max(self.paused_until, time() + min(wait_time, self.max_wait_time))
+
+    # parse the number of seconds to wait from a retry-after header
+    def parse_retry_after(self, value):
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time(), 0)
+        except (TypeError, ValueError):
+            return None
+
+    # parse the number of seconds to wait from a rate limit reset header, either a delay or a timestamp
+    def parse_reset_time(self, value):
+        try:
+            reset = float(value)
+        except ValueError:
+            return None
+        if reset > time() - 24 * 60 * 60:
+            reset -= time()
+        return max(reset, 0)
+
+
+# http connections kept alive and shared by the sessions of all the modules
+class ConnectionPool:
+
+    default = None
+    default_lock = Lock()
+
+    # create the pools of connections, one per host
+    def __init__(self, hosts_count=16, connections_count=32):
+        self.hosts_count = hosts_count
+        self.connections_count = connections_count
+        import_dependencies()
+        self.adapter = HTTPAdapter(pool_connections=hosts_count, pool_maxsize=connections_count)
+
+    # send the requests of a session through the shared connections
+    def mount(self, session):
+        session.mount('http://', self.adapter)
+        session.mount('https://', self.adapter)
+
+    # get the pool shared by all the scans of the process
+    @staticmethod
+    def get_default():
+        with ConnectionPool.default_lock:
+            if ConnectionPool.default is None:
+                ConnectionPool.default = ConnectionPool()
+            return ConnectionPool.default
+
+
+# response of the asyncio engine, read by the modules like the responses of the sync sessions
+class AsyncResponse:
+
+    # wrap an aiohttp response, with its whole body unless it is streamed
+    def __init__(self, response, content=None):
+        self.response = response
+        self.status_code = response.status
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.encoding = response.charset
+        self.content = content
+
+    # get the body as text
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    # get the body as json
+    def json(self):
+        return json.loads(self.content)
+
+    # release the connection of the response
+    def close(self):
+        self.response.release()
+
+    # yield the chunks of a streamed body while they are downloaded
+    async def aiter_content(self, chunk_size):
+        async for chunk in self.response.content.iter_chunked(chunk_size):
+            yield chunk
+
+
+# incremental decoder of a json array, returning its items as soon as their text is complete
+class JsonArrayDecoder:
+
+    # create a decoder for a text encoding
+    def __init__(self, encoding=None):
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        self.buffer = ''
+        self.started = False
+        self.finished = False
+
+    # decode a chunk of the body and return the items completed by it
+    def decode(self, chunk):
+        self.buffer += self.text_decoder.decode(chunk)
+        items = []
+        pos = 0
+        while self.finished == False:
+
+            # skip the separators between the items
+            while pos < len(self.buffer) and self.buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos == len(self.buffer):
+                break
+            if self.started == False:
+                if self.buffer[pos] != '[':
+                    raise ValueError("expected a json array")
+                self.started = True
+                pos += 1
+                continue
+            if self.buffer[pos] == ']':
+                self.finished = True
+                break
+
+            # decode the next item, or wait for more data if it is incomplete
+            try:
+                item, pos = self.decoder.raw_decode(self.buffer, pos)
+            except json.JSONDecodeError:
+                break
+            items.append(item)
+        self.buffer = self.buffer[pos:]
+        return items
+
+
+# transport recording the http exchanges of the modules in a directory, or replaying them without any network access
+class ResponseRecorder:
+
+    index_filename = 'index.jsonl'
+
+    # query parameters holding credentials, never written in the recorded urls
+    redacted_params = re.compile(r'([?&](?:key|apikey|api_key|token|access_token|secret)=)[^&#\s]*', re.IGNORECASE)
+
+    # create a recorder, or a replayer of the exchanges recorded in a directory, waiting the recorded times divided by the speed
+    def __init__(self, directory, replay=False, connection_pool=None, speed=1):
+        self.directory = directory
+        self.replaying = replay
+        self.connection_pool = connection_pool if connection_pool is not None else ConnectionPool.get_default()
+        self.speed = speed
+        self.lock = Lock()
+        self.exchanges = {}
+        import_dependencies()
+        if replay == True:
+            self.load()
+        else:
+            makedirs(directory, exist_ok=True)
+
+    # send the requests of a session through the recorder
+    def mount(self, session):
+        session.mount('http://', self)
+        session.mount('https://', self)
+
+    # check if the replayed exchanges are sent as fast as possible
+    def is_unpaced(self):
+        return self.replaying == True and self.speed <= 0
+
+    # send a request, as the transport adapter of a session
+    def send(self, request, **kwargs):
+        if self.replaying == True:
+            return self.replay(request)
+        return self.record(request, **kwargs)
+
+    # close the transport, the shared connections stay open
+    def close(self):
+        pass
+
+    # send a request over the network and record the response or the error
+    def record(self, request, **kwargs):
+
+        # download the whole body to record it, even for the streamed responses
+        start_time = time()
+        try:
+            response = self.connection_pool.adapter.send(request, **kwargs)
+            content = response.content
+        except (ConnectionError, Timeout, ChunkedEncodingError) as e:
+            self.save(request, {'error': e.__class__.__name__, 'message': self.redact(str(e)), 'elapsed': time() - start_time})
+            raise
+
+        # save the response with its raw headers, which keep the repeated cookies
+        original_response = getattr(response.raw, '_original_response', None)
+        headers = list(original_response.msg.items()) if original_response is not None else list(response.headers.items())
+        exchange = {
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': headers,
+            'encoding': response.encoding,
+            'elapsed': time() - start_time,
+        }
+        self.save(request, exchange, content)
+        return response
+
+    # save an exchange in the index of the directory and its body in a file named by its hash, so that new recordings in the same directory keep the previous bodies
+    def save(self, request, exchange, content=None):
+        with self.lock:
+            exchange = {'method': request.method, 'url': self.redact(request.url), 'body': self.get_body_hash(request), **exchange}
+            if content is not None:
+                exchange['file'] = f"{sha1(content).hexdigest()}.body"
+                with open(join(self.directory, exchange['file']), 'wb') as body_file:
+                    body_file.write(content)
+            with open(join(self.directory, self.index_filename), 'a') as index_file:
+                index_file.write(json.dumps(exchange) + '\n')
+
+    # load the exchanges recorded in the directory, in their recorded order for each request
+    def load(self):
+        with open(join(self.directory, self.index_filename), 'r') as index_file:
+            for line in index_file:
+                if line.strip() == '':
+                    continue
+                exchange = json.loads(line)
+                key = (exchange['method'], self.redact(exchange['url']), exchange['body'])
+                self.exchanges.setdefault(key, []).append(exchange)
+
+    # replay the next recorded exchange of a request, the last one is replayed again when they are all used
+    def replay(self, request):
+
+        # find the exchange of the request, recorded without its credentials
+        key = (request.method, self.redact(request.url), self.get_body_hash(request))
+        with self.lock:
+            exchanges = self.exchanges.get(key)
+            if exchanges is None:
+                raise ConnectionError(f"no recorded response for {request.method} {request.url}", request=request)
+            exchange = exchanges.pop(0) if len(exchanges) > 1 else exchanges[0]
+
+        # wait the time it took when it was recorded
+        if self.speed > 0:
+            sleep(exchange['elapsed'] / self.speed)
+
+        # raise the recorded error
+        if 'error' in exchange:
+            errors = {'ConnectionError': ConnectionError, 'Timeout': Timeout, 'ChunkedEncodingError': ChunkedEncodingError}
+            raise errors.get(exchange['error'], ConnectionError)(exchange['message'], request=request)
+
+        # build the recorded response, with a raw body from which the session reads the cookies
+        with open(join(self.directory, exchange['file']), 'rb') as body_file:
+            content = body_file.read()
+        response = Response()
+        response.status_code = exchange['status']
+        response.reason = exchange['reason']
+        for name, value in exchange['headers']:
+            if name.lower() != 'set-cookie':
+                response.headers[name] = value
+        response.encoding = exchange['encoding']
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.raw = RecordedBody(content, exchange['headers'])
+        response._content = content
+        response._content_consumed = True
+        return response
+
+    # hide the values of the credentials parameters of an url or an error message
+    def redact(self, text):
+        return self.redacted_params.sub(r'\1REDACTED', text)
+
+    # get a hash of the body of a request, to tell apart the requests sent to the same url
+    def get_body_hash(self, request):
+        body = request.body
+        if body is None:
+            return None
+        if isinstance(body, str) == True:
+            body = body.encode('utf-8')
+        return sha1(body).hexdigest()
+
+
+# raw body of a replayed response, with the raw headers read by the cookies jar of the sessions
+class RecordedBody(BytesIO):
+
+    # create a body from its content and its headers
+    def __init__(self, content, headers):
+        super().__init__(content)
+        self.msg = HTTPMessage()
+        for name, value in headers:
+            self.msg[name] = value
+        self._original_response = self
+
+
+# persistent cache of the modules responses stored in a sqlite database
+class ResponseCache:
+
+    default_directory = join(expanduser('~'), '.cache', 'subenum')
+    default_ttl = 24 * 60 * 60
+    default_max_size = 500 * 1000000
+
+    # open or create a cache in a directory
+    def __init__(self, directory=None, ttl=None, modules_ttl=None, max_size=None):
+        self.directory = directory if directory is not None else self.default_directory
+        self.ttl = ttl if ttl is not None else self.default_ttl
+        self.modules_ttl = modules_ttl if modules_ttl is not None else {}
+        self.max_size = max_size if max_size is not None else self.default_max_size
+        self.lock = Lock()
+
+        # create the database if needed
+        makedirs(self.directory, exist_ok=True)
+        self.connection = sqlite3.connect(join(self.directory, 'cache.sqlite3'), check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, module TEXT, domain TEXT, value TEXT, size INTEGER, created REAL, accessed REAL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self.connection.commit()
+        self.size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    # get a cached value, or None if it is missing or expired
+    def get(self, module, domain, key):
+        cache_key = self.get_cache_key(module, domain, key)
+        with self.lock:
+            row = self.connection.execute("SELECT value, size, created FROM responses WHERE key = ?", (cache_key,)).fetchone()
+            if row is None:
+                return None
+            value, size, created = row
+
+            # remove the value if it is expired
+            now = time()
+            if now - created > self.modules_ttl.get(module, self.ttl):
+                self.connection.execute("DELETE FROM responses WHERE key = ?", (cache_key,))
+                self.connection.commit()
+                self.size -= size
+                return None
+
+            # mark the value as recently used
+            self.connection.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, cache_key))
+            self.connection.commit()
+        return json.loads(value)
+
+    # store a value that can be serialized in json
+    def set(self, module, domain, key, value):
+        cache_key = self.get_cache_key(module, domain, key)
+        value = json.dumps(value)
+        size = len(value)
+        if size > self.max_size:
+            return
+        with self.lock:
+
+            # replace the previous value if any
+            row = self.connection.execute("SELECT size FROM responses WHERE key = ?", (cache_key,)).fetchone()
+            if row is not None:
+                self.size -= row[0]
+            now = time()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, module, domain, value, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (cache_key, module, domain, value, size, now, now)
+            )
+            self.size += size
+
+            # evict the least recently used values until the cache fits its maximum size
+            while self.size > self.max_size:
+                rows = self.connection.execute("SELECT key, size FROM responses ORDER BY accessed LIMIT 100").fetchall()
+                for old_key, old_size in rows:
+                    self.connection.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    self.size -= old_size
+                    if self.size <= self.max_size:
+                        break
+            self.connection.commit()
+
+    # remove all the cached values
+    def clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM responses")
+            self.connection.commit()
+            self.size = 0
+
+    # get the database key of a value
+    def get_cache_key(self, module, domain, key):
+        return f"{module}|{domain}|{key}"
+
+
+# dns client resolving many names concurrently over udp, caching the answers and filtering the wildcard zones
+class DnsResolver:
+
+    record_types = {'a': 1, 'cname': 5, 'aaaa': 28}
+    default_nameservers = ['1.1.1.1', '8.8.8.8']
+    negative_ttl = 300
+    wildcard_ttl = 300
+
+    # create a resolver sending a number of concurrent queries to a list of 'host[:port]' nameservers, keeping up to a number of answers and wildcards in its caches
+    def __init__(self, nameservers=None, concurrency=500, timeout=2, retries=2, cache_size=100000):
+        import_dependencies()
+        nameservers = nameservers if nameservers is not None else self.get_system_nameservers()
+        self.nameservers = [self.parse_nameserver(nameserver) for nameserver in nameservers]
+        if len(self.nameservers) == 0:
+            raise ValueError("no nameservers to resolve the subdomains")
+        self.concurrency = max(concurrency, 1)
+        self.timeout = timeout
+        self.retries = retries
+        self.cache_size = max(cache_size, 1)
+        self.answers = {}
+        self.wildcards = {}
+        self.queries_count = 0
+        self.lock = Lock()
+
+    # get the nameservers of the system, or public ones
+    @staticmethod
+    def get_system_nameservers():
+        nameservers = []
+        try:
+            with open('/etc/resolv.conf', 'r') as resolv_file:
+                for line in resolv_file:
+                    fields = line.split()
+                    if len(fields) >= 2 and fields[0] == 'nameserver':
+                        nameservers.append(fields[1])
+        except OSError:
+            pass
+        return nameservers if len(nameservers) > 0 else DnsResolver.default_nameservers
+
+    # parse a 'host', 'host:port' or '[ipv6]:port' nameserver
+    @staticmethod
+    def parse_nameserver(text):
+        text = text.strip()
+        if text.startswith('[') == True:
+            host, _, port = text[1:].partition(']')
+            port = port[1:]
+        elif text.count(':') == 1:
+            host, _, port = text.partition(':')
+        else:
+            host, port = text, ''
+        return (host, int(port) if port != '' else 53)
+
+    # get the records of the live subdomains, without the ones only matching a wildcard
+    def resolve_many(self, subdomains):
+        return asyncio.run(self.aresolve_many(subdomains))
+
+    # get the records of the live subdomains asynchronously
+    async def aresolve_many(self, subdomains):
+
+        # open a udp socket per nameserver
+        loop = asyncio.get_running_loop()
+        connections = []
+        try:
+            for nameserver in self.nameservers:
+                _, connection = await loop.create_datagram_endpoint(lambda: DnsConnection(loop), remote_addr=nameserver)
+                connections.append(connection)
+
+            # resolve the subdomains with a fixed number of workers
+            results = {}
+            subdomains_iterator = iter(subdomains)
+            async def resolve_worker():
+                for subdomain in subdomains_iterator:
+                    records = await self.aresolve(subdomain, connections)
+                    if records is not None and (len(records['a']) > 0 or len(records['aaaa']) > 0):
+                        results[subdomain] = records
+            await asyncio.gather(*[resolve_worker() for _ in range(self.concurrency)])
+
+            # probe each parent zone of the live subdomains for a wildcard, unless it was probed recently
+            zones = {subdomain.partition('.')[2] for subdomain in results}
+            wildcards = {}
+            for zone in zones:
+                cached = self.get_cached(self.wildcards, zone)
+                if cached is not None:
+                    wildcards[zone] = cached
+            zones_iterator = iter(zone for zone in zones if zone not in wildcards)
+            async def wildcard_worker():
+                for zone in zones_iterator:
+                    wildcards[zone] = await self.aget_wildcard(zone, connections)
+                    self.set_cached(self.wildcards, zone, wildcards[zone], self.wildcard_ttl)
+            await asyncio.gather(*[wildcard_worker() for _ in range(self.concurrency)])
+
+        # close the sockets
+        finally:
+            for connection in connections:
+                connection.close()
+
+        # remove the subdomains only answering the records of their zone wildcard
+        for subdomain, records in list(results.items()):
+            wildcard = wildcards[subdomain.partition('.')[2]]
+            if len(wildcard) > 0 and set(records['a'] + records['aaaa']).issubset(wildcard) == True:
+                del results[subdomain]
+        return results
+
+    # get the addresses answered for a random name of a zone, empty if it has no wildcard
+    async def aget_wildcard(self, zone, connections):
+        records = await self.aresolve(f"{getrandbits(48):012x}.{zone}", connections)
+        if records is None:
+            return set()
+        return set(records['a'] + records['aaaa'])
+
+    # get the a, aaaa and cname records of a subdomain, or None if the nameservers failed
+    async def aresolve(self, subdomain, connections):
+        answers = await asyncio.gather(self.aquery(subdomain, 'a', connections), self.aquery(subdomain, 'aaaa', connections))
+        if any(answer is None for answer in answers) == True:
+            return None
+        records = {'a': [], 'aaaa': [], 'cname': []}
+        for answer in answers:
+            for record_type, value in answer:
+                if value not in records[record_type]:
+                    records[record_type].append(value)
+        return records
+
+    # get the answers of a query from the cache or the nameservers, trying another nameserver when one fails
+    async def aquery(self, name, record_type, connections):
+
+        # use the cached answers if they did not expire
+        key = (name, record_type)
+        cached = self.get_cached(self.answers, key)
+        if cached is not None:
+            return cached
+
+        # send the query until a nameserver answers
+        try:
+            query = self.get_query(name, self.record_types[record_type])
+        except ValueError:
+            return []
+        first = hash(name) % len(connections)
+        for attempt in range(self.retries + 1):
+            connection = connections[(first + attempt) % len(connections)]
+            with self.lock:
+                self.queries_count += 1
+            try:
+                response = await connection.query(query, self.timeout)
+                rcode, answers, ttl = self.parse_response(response, name)
+            except (asyncio.TimeoutError, ValueError, OSError, IndexError, struct.error):
                 continue
-        return sorted(valid_subdomains)
+
+            # cache the answers and the missing names, retry the nameservers failures
+            if rcode in [0, 3]:
+                ttl = ttl if len(answers) > 0 else self.negative_ttl
+                self.set_cached(self.answers, key, answers, ttl)
+                return answers
+        return None
+
+    # get a value of a cache, or None if it is missing or expired, the caches are shared by the resolutions running in other threads
+    def get_cached(self, cache, key):
+        with self.lock:
+            cached = cache.get(key)
+        if cached is None or cached[0] <= time():
+            return None
+        return cached[1]
+
+    # store a value in a cache for a ttl, removing the expired entries then the oldest ones when the cache is full
+    def set_cached(self, cache, key, value, ttl):
+        with self.lock:
+            cache.pop(key, None)
+            if len(cache) >= self.cache_size:
+                now = time()
+                for expired_key in [cached_key for cached_key, cached in cache.items() if cached[0] <= now]:
+                    del cache[expired_key]
+                while len(cache) >= self.cache_size * 0.9:
+                    del cache[next(iter(cache))]
+            cache[key] = (time() + ttl, value)
+
+    # build a query packet with a random id
+    def get_query(self, name, record_type):
+        labels = name.rstrip('.').split('.')
+        question = b''
+        for label in labels:
+            label = label.encode('ascii')
+            if len(label) == 0 or len(label) > 63:
+                raise ValueError(f"invalid dns name: '{name}'")
+            question += bytes([len(label)]) + label
+        question += b'\x00' + struct.pack('>HH', record_type, 1)
+        return struct.pack('>HHHHHH', 0, 0x0100, 1, 0, 0, 0) + question
+
+    # parse the rcode, the a, aaaa and cname answers and their minimum ttl from a response packet
+    def parse_response(self, data, name):
+        _, flags, questions_count, answers_count, _, _ = struct.unpack('>HHHHHH', data[:12])
+        pos = 12
+        for _ in range(questions_count):
+            question_name, pos = self.read_name(data, pos)
+            pos += 4
+            if question_name.lower() != name.lower().rstrip('.'):
+                raise ValueError("answer of another question")
+        answers = []
+        ttls = []
+        record_types = {record_type: name for name, record_type in self.record_types.items()}
+        for _ in range(answers_count):
+            _, pos = self.read_name(data, pos)
+            record_type, _, ttl, length = struct.unpack('>HHIH', data[pos:pos + 10])
+            pos += 10
+            if record_type == 1 and length == 4:
+                answers.append(('a', inet_ntop(AF_INET, data[pos:pos + 4])))
+            elif record_type == 28 and length == 16:
+                answers.append(('aaaa', inet_ntop(AF_INET6, data[pos:pos + 16])))
+            elif record_type == 5:
+                answers.append(('cname', self.read_name(data, pos)[0]))
+            if record_type in record_types:
+                ttls.append(ttl)
+            pos += length
+        return flags & 0xf, answers, min(ttls) if len(ttls) > 0 else 0
+
+    # read a possibly compressed name from a packet, return it with the position after it
+    def read_name(self, data, pos):
+        labels = []
+        end_pos = None
+        for _ in range(128):
+            length = data[pos]
+            if length & 0xc0 == 0xc0:
+                if end_pos is None:
+                    end_pos = pos + 2
+                pos = ((length & 0x3f) << 8) | data[pos + 1]
+            elif length == 0:
+                return '.'.join(labels), end_pos if end_pos is not None else pos + 1
+            else:
+                labels.append(data[pos + 1:pos + 1 + length].decode('ascii', errors='replace'))
+                pos += length + 1
+        raise ValueError("invalid compressed dns name")
+
+
+# udp socket to a nameserver, matching the responses with the pending queries by their ids
+class DnsConnection:
+
+    receive_buffer_size = 4 * 1024 * 1024
+
+    # create a connection for the datagram endpoint of an event loop
+    def __init__(self, loop):
+        self.loop = loop
+        self.transport = None
+        self.pending = {}
+
+    # keep the transport of the socket, with a receive buffer large enough for the bursts of responses
+    def connection_made(self, transport):
+        self.transport = transport
+        sock = transport.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(SOL_SOCKET, SO_RCVBUF, self.receive_buffer_size)
+
+    # resolve the pending query of a response
+    def datagram_received(self, data, address):
+        if len(data) < 12:
+            return
+        future = self.pending.pop(int.from_bytes(data[:2], 'big'), None)
+        if future is not None and future.done() == False:
+            future.set_result(data)
+
+    # ignore the icmp errors, the queries time out
+    def error_received(self, error):
+        pass
+
+    # fail the pending queries when the socket is closed
+    def connection_lost(self, error):
+        for future in self.pending.values():
+            if future.done() == False:
+                future.set_exception(OSError("dns socket closed"))
+        self.pending.clear()
+
+    # send a query with an unused id and wait for its response
+    async def query(self, query, timeout):
+        query_id = getrandbits(16)
+        while query_id in self.pending:
+            query_id = getrandbits(16)
+        future = self.loop.create_future()
+        self.pending[query_id] = future
+        try:
+            self.transport.sendto(query_id.to_bytes(2, 'big') + query[2:])
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            if self.pending.get(query_id) is future:
+                del self.pending[query_id]
+
+    # close the socket
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
 
 
 # default module api class
 class ModuleApi:
 
+    # maximum number of requests per second, None for no limit
+    rate_limit = None
+    rate_burst = 1
+
+    # maximum number of seconds to connect or to wait for data
+    request_timeout = 30
+
+    # threads running the pages downloads
+    pages_executor = None
+    executors_lock = Lock()
+
+    # timeline of the scans, if they are traced
+    tracer = None
+
+    # module scan running in the current thread, set by the scans since the modules are shared by concurrent scans
+    current_scan = ContextVar('current_scan', default=None)
+
+    # http session of the asynchronous module scan running in the current task
+    async_session = ContextVar('async_session', default=None)
+
+    # parse the text and json responses in the worker processes when they are enabled, for the cpu bound parsers
+    process_parsing = False
+
+    # user agents shared by all the modules, loaded once per process
+    user_agents = None
+    user_agents_lock = Lock()
+
+    # cleanup of the names found by all the modules
+    normalizer = SubdomainsNormalizer()
+
     # create an api object
     def __init__(self, verbose=True, fast=False):
+        import_dependencies()
         self.base_name = self.__class__.__name__
+        self.rate_limiter = RateLimiter(self.rate_limit, burst=self.rate_burst)
+        self.retry_policy = RetryPolicy()
+        self.default_stats = ModuleStats()
         self.session = Session()
+        ConnectionPool.get_default().mount(self.session)
         self.verbose = verbose
         self.subdomains = None
         self.fast_scan = fast
+        self.cache = None
+        self.html_parser = 'html.parser'
+        self.parse_executor = None
 
     # get the subdomains from the api
-    def get_subdomains(self, domain):
+    def get_subdomains(self, domain, callback=None):
 
         # query the subdomains
         if self.verbose == True:
             self.print("Starting subdomains discovery...")
-        response = self.query_domain(domain)
-        if response is None:
-            return None
-
-        # parse the subdomains from the response
-        self.subdomains = self.parse_query_response(response, domain)
-        if self.subdomains is None:
+        subdomains = self.query_subdomains(domain)
+        if subdomains is None:
             return None
+        self.report_subdomains(subdomains, callback)
         
         # return the subdomains
+        self.subdomains = subdomains
         if self.verbose == True:
-            subdomains_count = len(self.subdomains)
-            self.print(f"{subdomains_count if subdomains_count > 0 else 'no'} subdomain{'s' if subdomains_count != 1 else ''} found.")
-        return self.subdomains
+            self.print_subdomains_count(subdomains)
+        return subdomains
     
+    # get the subdomains from the api asynchronously
+    async def aget_subdomains(self, domain, callback=None):
+
+        # query the subdomains
+        if self.verbose == True:
+            self.print("Starting subdomains discovery...")
+        subdomains = await self.aquery_subdomains(domain)
+        if subdomains is None:
+            return None
+        self.report_subdomains(subdomains, callback)
+
+        # return the subdomains
+        self.subdomains = subdomains
+        if self.verbose == True:
+            self.print_subdomains_count(subdomains)
+        return subdomains
+
+    # query and parse the subdomains of the domain
+    def query_subdomains(self, domain):
+        return self.query_cached_subdomains(domain, 'subdomains', self.query_domain, domain)
+
+    # query and parse the subdomains of the domain asynchronously
+    async def aquery_subdomains(self, domain):
+        return await self.aquery_cached_subdomains(domain, 'subdomains', self.aquery_domain, domain)
+
     # query the domain
     def query_domain(self, domain):
         return None
-    
+
+    # query the domain asynchronously
+    async def aquery_domain(self, domain):
+        return None
+
     # parse the query response
     def parse_query_response(self, text, domain):
         return None
+
+    # parse the query response asynchronously, with the parser of the sync scans by default
+    async def aparse_query_response(self, response, domain):
+        return self.parse_query_response(response, domain)
+
+    # check that a response succeeded and return its text, None if it failed
+    def read_text_response(self, response):
+        if response.status_code != 200:
+            if self.verbose == True:
+                self.print_error(f"received unknown response code: '{response.status_code}'.")
+            return None
+        return response.text
+
+    # check that a response succeeded and return its json content, None if it failed
+    def read_json_response(self, response):
+        if response.status_code != 200:
+            if self.verbose == True:
+                self.print_error(f"received unknown response code: '{response.status_code}'.")
+            return None
+        return response.json()
+
+    # get the metrics of the module scan running in the current thread, or the ones of the module outside of the scans
+    @property
+    def stats(self):
+        scan = ModuleApi.current_scan.get()
+        return scan.stats if scan is not None else self.default_stats
+
+    # get the event set when the module scan running in the current thread is stopped, None outside of the scans
+    def get_stop_event(self):
+        scan = ModuleApi.current_scan.get()
+        return scan.stop_event if scan is not None else None
+
+    # raise an error if the module scan running in the current thread was stopped
+    def check_stopped(self):
+        stop_event = self.get_stop_event()
+        if stop_event is not None and stop_event.is_set() == True:
+            raise ScanStopped()
+
+    # get a random user agent from the pool shared by all the modules
+    def get_random_user_agent(self):
+        with ModuleApi.user_agents_lock:
+            if ModuleApi.user_agents is None:
+                ModuleApi.user_agents = UserAgent()
+        return ModuleApi.user_agents.random
+
+    # get the threads downloading the pages of the modules concurrently
+    def get_pages_executor(self):
+        with ModuleApi.executors_lock:
+            if ModuleApi.pages_executor is None:
+                ModuleApi.pages_executor = DaemonThreadPool(64, name='subenum-pages')
+        return ModuleApi.pages_executor
+
+    # parse and normalize the subdomains of a page, counting the parse time
+    def parse_response(self, response, domain):
+        start_time = time()
+        try:
+            if self.is_parsed_in_process(response) == True:
+                return self.parse_executor.submit(parse_in_process, self.__class__, self.get_parse_state(), response, domain).result()
+            return self.parse_normalized_response(response, domain)
+        finally:
+            self.stats.count_page(time() - start_time)
+            self.trace('parse', 'parse', start_time, {'domain': domain})
+
+    # parse and normalize the subdomains of a page asynchronously, in the worker processes without blocking the event loop when they are enabled
+    async def aparse_response(self, response, domain):
+        start_time = time()
+        try:
+            if self.is_parsed_in_process(response) == True:
+                return await asyncio.wrap_future(self.parse_executor.submit(parse_in_process, self.__class__, self.get_parse_state(), response, domain))
+            subdomains = await self.aparse_query_response(response, domain)
+            if subdomains is None:
+                return None
+            return self.normalizer.normalize(subdomains, domain)
+        finally:
+            self.stats.count_page(time() - start_time)
+            self.trace('parse', 'parse', start_time, {'domain': domain})
+
+    # parse and normalize the subdomains of a page
+    def parse_normalized_response(self, response, domain):
+        subdomains = self.parse_query_response(response, domain)
+        if subdomains is None:
+            return None
+        return self.normalizer.normalize(subdomains, domain)
+
+    # check if a response is sent to the worker processes, the streamed responses are parsed while they are downloaded
+    def is_parsed_in_process(self, response):
+        return self.parse_executor is not None and self.process_parsing == True and isinstance(response, (str, dict, list)) == True
+
+    # get the attributes used by the parsers, to recreate the module in a worker process
+    def get_parse_state(self):
+        return {'base_name': self.base_name, 'verbose': self.verbose, 'fast_scan': self.fast_scan, 'html_parser': self.html_parser}
+
+    # add a span of the module ending now to the timeline of the scans
+    def trace(self, name, category, start_time, args=None):
+        if self.tracer is not None:
+            self.tracer.add_span(f"{self.base_name}: {name}", category, start_time, args=args)
+
+    # query and parse the subdomains of a response unless they are cached
+    def query_cached_subdomains(self, domain, key, query, *args):
+        subdomains = self.cache_get(domain, key)
+        if subdomains is not None:
+            return subdomains
+        response = query(*args)
+        if response is None:
+            return None
+        subdomains = self.parse_response(response, domain)
+        if subdomains is not None:
+            self.cache_set(domain, key, subdomains)
+        return subdomains
+
+    # query and parse the subdomains of a response asynchronously unless they are cached
+    async def aquery_cached_subdomains(self, domain, key, query, *args):
+        subdomains = self.cache_get(domain, key)
+        if subdomains is not None:
+            return subdomains
+        response = await query(*args)
+        if response is None:
+            return None
+        subdomains = await self.aparse_response(response, domain)
+        if subdomains is not None:
+            self.cache_set(domain, key, subdomains)
+        return subdomains
+
+    # query a json response unless it is cached
+    def query_cached_response(self, domain, key, query, *args):
+        response = self.cache_get(domain, key)
+        if response is not None:
+            return response
+        response = query(*args)
+        if response is not None:
+            self.cache_set(domain, key, response)
+        return response
+
+    # query a json response asynchronously unless it is cached
+    async def aquery_cached_response(self, domain, key, query, *args):
+        response = self.cache_get(domain, key)
+        if response is not None:
+            return response
+        response = await query(*args)
+        if response is not None:
+            self.cache_set(domain, key, response)
+        return response
+
+    # get a value from the responses cache
+    def cache_get(self, domain, key):
+        if self.cache is None:
+            return None
+        return self.cache.get(self.base_name, domain, key)
+
+    # store a value in the responses cache
+    def cache_set(self, domain, key, value):
+        if self.cache is not None:
+            self.cache.set(self.base_name, domain, key, value)
     
     # get a domain from an url
     def get_domain_from_url(self, url):
@@ -208,17 +3268,207 @@ class ModuleApi:
         if pos != -1:
             url = url[:pos]
 
-        # remove the port
-        pos = url.find(':')
-        if pos != -1:
-            url = url[:pos]
+        # remove the port
+        pos = url.find(':')
+        if pos != -1:
+            url = url[:pos]
+
+        # return the url domain
+        return url
+    
+    # send a http request to the source at the pace allowed by its rate limiter
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.request_timeout)
+        throttled_count = 0
+        failed_count = 0
+        while True:
+
+            # do not send the requests of a stopped scan, even while they wait for the rate limiter
+            self.check_stopped()
+            start_time = time()
+            if self.rate_limiter.acquire(self.get_stop_event()) == False:
+                raise ScanStopped()
+            self.stats.count_rate_limit(time() - start_time)
+            if time() - start_time > 0.001:
+                self.trace('rate limit', 'wait', start_time)
+
+            # retry the requests that failed because of the network, the streamed bodies are counted while they are read
+            start_time = time()
+            try:
+                response = self.session.request(method, url, **kwargs)
+                bytes_count = len(response.content) if kwargs.get('stream') != True else 0
+            except (ConnectionError, Timeout, ChunkedEncodingError) as e:
+                self.stats.count_request(e.__class__.__name__, time() - start_time)
+                self.trace(f"{method} {url}", 'http', start_time, {'error': e.__class__.__name__})
+                if failed_count >= self.retry_policy.retries:
+                    raise
+                failed_count += 1
+                self.wait_retry(failed_count, e.__class__.__name__)
+                continue
+            self.stats.count_request(response.status_code, time() - start_time, bytes_count)
+            self.trace(f"{method} {url}", 'http', start_time, {'status': response.status_code, 'bytes': bytes_count})
+
+            # adapt the pace to the rate limit headers and retry the throttled requests
+            wait_time = self.rate_limiter.update(response)
+            if response.status_code == 429 and wait_time is not None and throttled_count < self.rate_limiter.max_retries:
+                if self.verbose == True:
+                    self.print(f"rate limited, retrying in {wait_time:0.1f} secs...")
+                response.close()
+                throttled_count += 1
+                self.count_retry(wait_time)
+                continue
+
+            # retry the requests that failed because of a temporary server error
+            if response.status_code in self.retry_policy.statuses and failed_count < self.retry_policy.retries:
+                response.close()
+                failed_count += 1
+                self.wait_retry(failed_count, f"response code '{response.status_code}'")
+                continue
+            return response
+
+    # wait before retrying a failed request
+    def wait_retry(self, failed_count, reason):
+        wait_time = self.retry_policy.get_wait_time(failed_count)
+        if self.verbose == True:
+            self.print(f"{reason}, retrying in {wait_time:0.1f} secs ({failed_count}/{self.retry_policy.retries})...")
+        self.count_retry(wait_time)
+        start_time = time()
+        stop_event = self.get_stop_event()
+        if stop_event is None:
+            sleep(wait_time)
+        elif stop_event.wait(wait_time) == True:
+            raise ScanStopped()
+        self.trace('retry', 'wait', start_time, {'reason': reason})
+
+    # send a http request to the source asynchronously at the pace allowed by its rate limiter, the body is downloaded unless it is streamed
+    async def arequest(self, method, url, stream=False, **kwargs):
+        session = self.get_async_session()
+        kwargs = self.get_async_request_options(kwargs)
+        throttled_count = 0
+        failed_count = 0
+        while True:
+
+            # do not send the requests of a stopped scan
+            self.check_stopped()
+            start_time = time()
+            await self.rate_limiter.aacquire()
+            self.stats.count_rate_limit(time() - start_time)
+            if time() - start_time > 0.001:
+                self.trace('rate limit', 'wait', start_time)
+
+            # retry the requests that failed because of the network, the streamed bodies are counted while they are read
+            start_time = time()
+            try:
+                response = await session.request(method, url, **kwargs)
+                content = await response.read() if stream == False else None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.stats.count_request(e.__class__.__name__, time() - start_time)
+                self.trace(f"{method} {url}", 'http', start_time, {'error': e.__class__.__name__})
+                if failed_count >= self.retry_policy.retries:
+                    raise
+                failed_count += 1
+                await self.await_retry(failed_count, e.__class__.__name__)
+                continue
+            response = AsyncResponse(response, content)
+            bytes_count = len(content) if content is not None else 0
+            self.stats.count_request(response.status_code, time() - start_time, bytes_count)
+            self.trace(f"{method} {url}", 'http', start_time, {'status': response.status_code, 'bytes': bytes_count})
+
+            # adapt the pace to the rate limit headers and retry the throttled requests
+            wait_time = self.rate_limiter.update(response)
+            if response.status_code == 429 and wait_time is not None and throttled_count < self.rate_limiter.max_retries:
+                if self.verbose == True:
+                    self.print(f"rate limited, retrying in {wait_time:0.1f} secs...")
+                response.close()
+                throttled_count += 1
+                self.count_retry(wait_time)
+                continue
+
+            # retry the requests that failed because of a temporary server error
+            if response.status_code in self.retry_policy.statuses and failed_count < self.retry_policy.retries:
+                response.close()
+                failed_count += 1
+                await self.await_retry(failed_count, f"response code '{response.status_code}'")
+                continue
+            return response
+
+    # get the http session of the asynchronous scan running in the current task
+    def get_async_session(self):
+        session = ModuleApi.async_session.get()
+        if session is None:
+            raise RuntimeError("the asynchronous requests are only sent during the asynchronous scans")
+        return session
+
+    # convert the options of a request of the sync sessions to the ones of aiohttp
+    def get_async_request_options(self, kwargs):
+        options = dict(kwargs)
+        timeout = options.pop('timeout', self.request_timeout)
+        options['timeout'] = aiohttp.ClientTimeout(sock_connect=timeout, sock_read=timeout)
+        if options.get('params') is not None:
+            options['params'] = {name: str(value) for name, value in options['params'].items() if value is not None}
+        auth = options.get('auth')
+        if auth is not None:
+            options['auth'] = aiohttp.BasicAuth(auth.username, auth.password)
+        return options
+
+    # wait asynchronously before retrying a failed request
+    async def await_retry(self, failed_count, reason):
+        wait_time = self.retry_policy.get_wait_time(failed_count)
+        if self.verbose == True:
+            self.print(f"{reason}, retrying in {wait_time:0.1f} secs ({failed_count}/{self.retry_policy.retries})...")
+        self.count_retry(wait_time)
+        start_time = time()
+        await asyncio.sleep(wait_time)
+        self.check_stopped()
+        self.trace('retry', 'wait', start_time, {'reason': reason})
+
+    # count a retry and the time waited before it
+    def count_retry(self, wait_time):
+        self.stats.count_retry(wait_time)
+
+    # convert a html text to a tree, only building the tags matched by the strainer if any
+    def parse_html(self, text, parse_only=None):
+        return BeautifulSoup(text, features=self.html_parser, parse_only=parse_only)
+
+    # yield the items of a streamed json array without loading the whole body
+    def iter_json_array(self, response, chunk_size=65536):
+        decoder = JsonArrayDecoder(response.encoding)
+        chunks = response.iter_content(chunk_size=chunk_size)
+        while decoder.finished == False:
+            start_time = time()
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise ValueError("incomplete json array")
+            self.stats.count_stream(time() - start_time, len(chunk))
+            yield from decoder.decode(chunk)
+
+    # yield the items of a json array streamed by the asyncio engine without loading the whole body
+    async def aiter_json_array(self, response, chunk_size=65536):
+        decoder = JsonArrayDecoder(response.encoding)
+        start_time = time()
+        async for chunk in response.aiter_content(chunk_size):
+            self.stats.count_stream(time() - start_time, len(chunk))
+            for item in decoder.decode(chunk):
+                yield item
+            if decoder.finished == True:
+                return
+            start_time = time()
+        raise ValueError("incomplete json array")
+
+    # send the subdomains parsed from a response to the scan callback, return False to stop paginating
+    def report_subdomains(self, subdomains, callback):
+        if callback is not None and len(subdomains) > 0:
+            return callback(self, subdomains) != False
+        return True
+
+    # print the number of subdomains found by the module
+    def print_subdomains_count(self, subdomains):
+        subdomains_count = len(subdomains)
+        self.print(f"{subdomains_count if subdomains_count > 0 else 'no'} subdomain{'s' if subdomains_count != 1 else ''} found.")
 
-        # return the url domain
-        return url
-    
     # print a message from the module
     def print(self, text):
-        print(f"[*] \033[92m{self.base_name}\033[0m: {text}")
+        print(f"[*] \033[92m{self.base_name}\033[0m: {text}", file=sys.stderr)
 
     # print an error message from the module
     def print_error(self, text):
@@ -228,44 +3478,107 @@ class ModuleApi:
 # default module search engine class
 class ModuleSearchEngine(ModuleApi):
 
+    # number of pages downloaded at the same time
+    pages_fanout = 3
+
     # get the subdomains from the search engine
-    def get_subdomains(self, domain):
+    def get_subdomains(self, domain, callback=None):
 
-        # query the first 10 pages
+        # query the first 10 pages by groups of concurrent pages, the pages not started yet are skipped once a page fails
         if self.verbose == True:
             self.print("Starting subdomains discovery...")
-        self.subdomains = []
-        for page in range(1, 10):
-
-            # query the current page
-            response = self.query_domain_page(domain, page)
-            if response is None:
+        subdomains = SubdomainsCollector()
+        failed = Event()
+        for pages in self.get_pages_groups():
+            executor = self.get_pages_executor()
+            futures = [executor.submit(copy_context().run, self.query_page_subdomains, domain, page, failed) for page in pages]
+            pages_subdomains = [future.result() for future in futures]
+
+            # add the subdomains found in the pages until a page fails
+            if self.add_pages_subdomains(subdomains, pages_subdomains, callback) == False:
                 break
 
-            # parse the subdomains from the page response
-            page_subdomains = self.parse_query_response(response, domain)
-            if page_subdomains is None:
-                break
+        # return the complete list of all subdomains found
+        subdomains = subdomains.get_subdomains()
+        self.subdomains = subdomains
+        if self.verbose == True:
+            self.print_subdomains_count(subdomains)
+        return subdomains
+    
+    # get the subdomains from the search engine asynchronously
+    async def aget_subdomains(self, domain, callback=None):
 
-            # add the subdomains found to the list
-            for subdomain in page_subdomains:
-                if subdomain not in self.subdomains:
-                    self.subdomains.append(subdomain)
+        # query the first 10 pages by groups of concurrent pages, the pages not started yet are skipped once a page fails
+        if self.verbose == True:
+            self.print("Starting subdomains discovery...")
+        subdomains = SubdomainsCollector()
+        failed = Event()
+        for pages in self.get_pages_groups():
+            pages_subdomains = await asyncio.gather(*[self.aquery_page_subdomains(domain, page, failed) for page in pages])
 
-            # stop at the first page if we are in fast mode
-            if self.fast_scan == True:
+            # add the subdomains found in the pages until a page fails
+            if self.add_pages_subdomains(subdomains, pages_subdomains, callback) == False:
                 break
 
         # return the complete list of all subdomains found
+        subdomains = subdomains.get_subdomains()
+        self.subdomains = subdomains
         if self.verbose == True:
-            subdomains_count = len(self.subdomains)
-            self.print(f"{subdomains_count if subdomains_count > 0 else 'no'} subdomain{'s' if subdomains_count != 1 else ''} found.")
-        return self.subdomains
-    
+            self.print_subdomains_count(subdomains)
+        return subdomains
+
+    # query and parse the subdomains of a page unless a page failed, which may be a captcha or a ban
+    def query_page_subdomains(self, domain, page, failed):
+        if failed.is_set() == True:
+            return None
+        subdomains = self.query_cached_subdomains(domain, f"page:{page}", self.query_domain_page, domain, page)
+        if subdomains is None:
+            failed.set()
+        return subdomains
+
+    # query and parse the subdomains of a page asynchronously unless a page failed
+    async def aquery_page_subdomains(self, domain, page, failed):
+        if failed.is_set() == True:
+            return None
+        subdomains = await self.aquery_cached_subdomains(domain, f"page:{page}", self.aquery_domain_page, domain, page)
+        if subdomains is None:
+            failed.set()
+        return subdomains
+
+    # get the groups of pages to download at the same time, the first page alone so that a blocked search engine does not get a whole group
+    def get_pages_groups(self):
+        if self.fast_scan == True:
+            return [[1]]
+        pages = list(range(2, 10))
+        fanout = max(self.pages_fanout, 1)
+        return [[1]] + [pages[pos:pos + fanout] for pos in range(0, len(pages), fanout)]
+
+    # add the subdomains of consecutive pages, return False when the pagination must stop
+    def add_pages_subdomains(self, subdomains, pages_subdomains, callback):
+        for page_subdomains in pages_subdomains:
+            if page_subdomains is None:
+                return False
+            subdomains.update(page_subdomains)
+            if self.report_subdomains(page_subdomains, callback) == False:
+                return False
+        return True
+
     # query a domain page
     def query_domain_page(self, domain, page):
-        return None
-    
+        return self.read_page_response(self.request('GET', self.base_url, **self.get_page_request(domain, page)))
+
+    # query a domain page asynchronously
+    async def aquery_domain_page(self, domain, page):
+        return self.read_page_response(await self.arequest('GET', self.base_url, **self.get_page_request(domain, page)))
+
+    # get the headers and the parameters of the request of a domain page
+    def get_page_request(self, domain, page):
+        return {}
+
+    # check the response of a domain page and return its text
+    def read_page_response(self, response):
+        return self.read_text_response(response)
+
 
 # default module api class with a key
 class ModuleApiWithKey(ModuleApi):
@@ -288,6 +3601,8 @@ class ModuleApiWithAuth(ModuleApi):
 # ThreatCrowd api
 class ThreatCrowd(ModuleApi):
 
+    process_parsing = True
+
     # create a ThreatCrowd object
     def __init__(self, verbose=True):
         super().__init__(verbose=verbose)
@@ -295,19 +3610,13 @@ class ThreatCrowd(ModuleApi):
 
     # download a domain report
     def query_domain(self, domain):
-
-        # query the website
         params = { 'domain': domain }
-        response = self.session.get(self.base_url, params=params)
+        return self.read_text_response(self.request('GET', self.base_url, params=params))
 
-        # check for errors
-        if response.status_code != 200:
-            if self.verbose == True:
-                self.print_error(f"received unknown response code: '{response.status_code}'.")
-            return None
-        
-        # return the text response
-        return response.text
+    # download a domain report asynchronously
+    async def aquery_domain(self, domain):
+        params = { 'domain': domain }
+        return self.read_text_response(await self.arequest('GET', self.base_url, params=params))
     
     # parse a domain report
     def parse_query_response(self, text, domain):
@@ -319,45 +3628,92 @@ class ThreatCrowd(ModuleApi):
         lines = text.split('\n')
 
         # parse all subdomains
-        subdomains = []
+        subdomains = SubdomainsCollector()
         for line in lines:
             pos = line.find("id: '")
             if pos != -1:
                 id = line[pos + 5:]
                 end_pos = id.find("'")
-                id = id[:end_pos]
-                if id.endswith(domain) == True:
-                    while id[0] == '.':
-                        id = id[1:]
-                    if id == domain:
-                        continue
-                    if id in subdomains:
-                        continue
-                    subdomains.append(id)
+                subdomains.add(id[:end_pos])
 
         # return the list of subdomains
-        return subdomains
+        return subdomains.get_subdomains()
 
 
 # crt.sh api
 class CertificatesSearch(ModuleApi):
 
+    rate_limit = 1
+    process_parsing = True
+
     # create a crtsh object
-    def __init__(self, verbose=True):
+    def __init__(self, verbose=True, use_json=True, exclude_expired=False):
         super().__init__(verbose=verbose)
         self.base_url = "https://crt.sh/"
-    
-    # query a domain informations from crt.sh
-    def query_domain(self, domain, try_count=0):
+        self.use_json = use_json
+        self.exclude_expired = exclude_expired
+
+    # query and parse the subdomains of a domain from the json output first, falling back to the html one if it fails or breaks while it streams, cached apart for each expired certificates filter
+    def query_subdomains(self, domain):
+        cache_key = f"subdomains:expired={self.exclude_expired}"
+        if self.use_json == True:
+            subdomains = self.query_cached_subdomains(domain, cache_key, self.query_domain_json, domain)
+            if subdomains is not None:
+                return subdomains
+        return self.query_cached_subdomains(domain, cache_key, self.query_domain_html, domain)
+
+    # query and parse the subdomains of a domain asynchronously, from the json output first then from the html one
+    async def aquery_subdomains(self, domain):
+        cache_key = f"subdomains:expired={self.exclude_expired}"
+        if self.use_json == True:
+            subdomains = await self.aquery_cached_subdomains(domain, cache_key, self.aquery_domain_json, domain)
+            if subdomains is not None:
+                return subdomains
+        return await self.aquery_cached_subdomains(domain, cache_key, self.aquery_domain_html, domain)
+
+    # query a domain streamed json informations from crt.sh
+    def query_domain_json(self, domain):
+        params = self.get_query_params(domain)
+        params['output'] = 'json'
+        return self.read_json_output_response(self.request('GET', self.base_url, params=params, stream=True))
+
+    # query a domain streamed json informations from crt.sh asynchronously
+    async def aquery_domain_json(self, domain):
+        params = self.get_query_params(domain)
+        params['output'] = 'json'
+        return self.read_json_output_response(await self.arequest('GET', self.base_url, params=params, stream=True))
+
+    # check the response of the json output, without downloading its body yet
+    def read_json_output_response(self, response):
+
+        # check for errors
+        if response.status_code in [502, 503]:
+            response.close()
+            if self.verbose == True:
+                self.print_error(f"json output is currently unavailable.")
+            return None
+        elif response.status_code != 200 or response.headers.get('content-type', '').find('json') == -1:
+            response.close()
+            if self.verbose == True:
+                self.print_error(f"received unknown json response code: '{response.status_code}'.")
+            return None
 
-        # query the website
-        params = { 'q': domain }
-        response = self.session.get(self.base_url, params=params)
+        # return the streamed response
+        return response
+
+    # query a domain html informations from crt.sh
+    def query_domain_html(self, domain):
+        return self.read_html_output_response(self.request('GET', self.base_url, params=self.get_query_params(domain)))
+
+    # query a domain html informations from crt.sh asynchronously
+    async def aquery_domain_html(self, domain):
+        return self.read_html_output_response(await self.arequest('GET', self.base_url, params=self.get_query_params(domain)))
+
+    # check the response of the html output and return its text
+    def read_html_output_response(self, response):
 
         # check for errors
         if response.status_code in [502, 503]:
-            if try_count < 3:
-                return self.query_domain(domain, try_count=try_count + 1)
             if self.verbose == True:
                 self.print_error(f"service is currently unavailable.")
             return None
@@ -368,15 +3724,85 @@ class CertificatesSearch(ModuleApi):
         
         # return the text response
         return response.text
-    
+
+    # get the parameters of a domain query with the server side filters
+    def get_query_params(self, domain):
+        params = { 'q': domain, 'deduplicate': 'Y' }
+        if self.exclude_expired == True:
+            params['exclude'] = 'expired'
+        return params
+
     # parse a query response from crt.sh
-    def parse_query_response(self, text, domain):
+    def parse_query_response(self, response, domain):
+        if isinstance(response, str) == True:
+            return self.parse_html_response(response, domain)
+        return self.parse_json_response(response, domain)
+
+    # parse a query response from crt.sh asynchronously, the json output is streamed by the asyncio engine
+    async def aparse_query_response(self, response, domain):
+        if isinstance(response, str) == True:
+            return self.parse_html_response(response, domain)
+        return await self.aparse_json_response(response, domain)
+
+    # parse a streamed json response from crt.sh
+    def parse_json_response(self, response, domain):
+
+        # parse the certificates one by one while the body is downloaded
+        subdomains = SubdomainsCollector()
+        try:
+            for certificate in self.iter_json_array(response):
+                self.add_certificate_names(subdomains, certificate)
+        except ValueError:
+            if self.verbose == True:
+                self.print_error("received an invalid json response.")
+            return None
+        except RequestException as e:
+            if self.verbose == True:
+                self.print_error(f"json response interrupted: {e.__class__.__name__}.")
+            return None
+        finally:
+            response.close()
+
+        # return the subdomains found
+        return subdomains.get_subdomains()
+
+    # parse a json response streamed by the asyncio engine from crt.sh
+    async def aparse_json_response(self, response, domain):
+
+        # parse the certificates one by one while the body is downloaded
+        subdomains = SubdomainsCollector()
+        try:
+            async for certificate in self.aiter_json_array(response):
+                self.add_certificate_names(subdomains, certificate)
+        except ValueError:
+            if self.verbose == True:
+                self.print_error("received an invalid json response.")
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if self.verbose == True:
+                self.print_error(f"json response interrupted: {e.__class__.__name__}.")
+            return None
+        finally:
+            response.close()
+
+        # return the subdomains found
+        return subdomains.get_subdomains()
 
-        # convert the text response to html
-        soup = BeautifulSoup(text, features="html.parser")
+    # add the names of a certificate of the json output
+    def add_certificate_names(self, subdomains, certificate):
+        for field in ['common_name', 'name_value']:
+            names = certificate.get(field)
+            if names is not None:
+                subdomains.update(names.split('\n'))
+
+    # parse a html query response from crt.sh
+    def parse_html_response(self, text, domain):
+
+        # convert the results tables of the text response to html
+        soup = self.parse_html(text, parse_only=SoupStrainer('td', {'class': 'outer'}))
 
         # parse the subdomains from the html
-        subdomains = []
+        subdomains = SubdomainsCollector()
         outers = soup.find_all('td', {'class': 'outer'})
         for outer in outers:
             elems_list = outer.find_all("tr")
@@ -392,60 +3818,46 @@ class CertificatesSearch(ModuleApi):
                                     subdomain = subdomain[4:]
                                 if subdomain.endswith('</td>') == True:
                                     subdomain = subdomain[:-5]
-                                if subdomain.endswith(domain) == False:
-                                    continue
-                                if subdomain not in subdomains:
-                                    subdomains.append(subdomain)
+                                subdomains.add(subdomain)
                         field_id += 1
         
         # return the subdomains found
-        return subdomains
+        return subdomains.get_subdomains()
 
 
 # DNSDumpster api
 class DNSDumpster(ModuleApi):
 
+    process_parsing = True
+
     # create a dnsdumpster object
     def __init__(self, verbose=True):
         super().__init__(verbose=verbose)
         self.base_url = "https://dnsdumpster.com/"
 
-    # get the subdomains from dnsdumpster
-    def get_subdomains(self, domain):
-
-        # query the csrf token
-        if self.verbose == True:
-            self.print("Starting subdomains discovery...")
-        response = self.query_csrf_token()
-        if response is None:
+    # query a csrf token then the informations of a domain from dnsdumpster
+    def query_domain(self, domain):
+        text = self.read_csrf_token_response(self.request('GET', self.base_url))
+        if text is None:
             return None
-
-        # parse the csrf token from the response
-        csrf_token = self.parse_csrf_token_response(response)
+        csrf_token = self.parse_csrf_token_response(text)
         if csrf_token is None:
             return None
+        cookies = { 'csrftoken': self.session.cookies["csrftoken"] }
+        return self.read_text_response(self.request('POST', self.base_url, cookies=cookies, **self.get_report_request(domain, csrf_token)))
 
-        # query the domain from dnsdumpster
-        response = self.query_domain(domain, csrf_token)
-        if response is None:
+    # query a csrf token then the informations of a domain from dnsdumpster asynchronously, the csrf cookie is kept by the session of the scan
+    async def aquery_domain(self, domain):
+        text = self.read_csrf_token_response(await self.arequest('GET', self.base_url))
+        if text is None:
             return None
-
-        # parse the subdomains from the response
-        self.subdomains = self.parse_query_response(response, domain)
-        if self.subdomains is None:
+        csrf_token = self.parse_csrf_token_response(text)
+        if csrf_token is None:
             return None
-        
-        # return the subdomains
-        if self.verbose == True:
-            subdomains_count = len(self.subdomains)
-            self.print(f"{subdomains_count if subdomains_count > 0 else 'no'} subdomain{'s' if subdomains_count != 1 else ''} found.")
-        return self.subdomains
-    
-    # query a csrf token from dnsdumpster
-    def query_csrf_token(self):
+        return self.read_text_response(await self.arequest('POST', self.base_url, **self.get_report_request(domain, csrf_token)))
 
-        # query the website
-        response = self.session.get(self.base_url)
+    # check the response of the csrf token page and return its text
+    def read_csrf_token_response(self, response):
 
         # check for errors
         if response.status_code != 200:
@@ -458,37 +3870,25 @@ class DNSDumpster(ModuleApi):
     
     # parse a query response
     def parse_csrf_token_response(self, text):
-        soup = BeautifulSoup(text, features="html.parser")
+        soup = self.parse_html(text, parse_only=SoupStrainer('input', {'name': 'csrfmiddlewaretoken'}))
         input = soup.find('input', {'name': 'csrfmiddlewaretoken'})
         return input["value"]
     
-    # query a domain informations from dnsdumpster
-    def query_domain(self, domain, csrf_token):
-
-        # query the website
-        cookies = { 'csrftoken': self.session.cookies["csrftoken"] }
+    # get the headers and the form of the request of a domain report
+    def get_report_request(self, domain, csrf_token):
         headers = { 'referer': 'https://dnsdumpster.com/' }
         data = { 'csrfmiddlewaretoken': csrf_token, 'targetip': domain, 'user': 'free' }
-        response = self.session.post(self.base_url, cookies=cookies, headers=headers, data=data)
-
-        # check for errors
-        if response.status_code != 200:
-            if self.verbose == True:
-                self.print_error(f"received unknown response code: '{response.status_code}'.")
-            return None
-        
-        # return the response text
-        return response.text
+        return { 'headers': headers, 'data': data }
     
     # parse a query response from dnsdumpster
     def parse_query_response(self, text, domain):
         
-        # convert the text response to html
-        soup = BeautifulSoup(text, features="html.parser")
+        # convert the tables of the text response to html
+        soup = self.parse_html(text, parse_only=SoupStrainer('table', {'class': 'table'}))
         tables = soup.find_all('table', {'class': 'table'})
 
         # parse the subdomains from the tables
-        subdomains = []
+        subdomains = SubdomainsCollector()
         for table in tables:
             td_list = table.find_all('td', {'class': 'col-md-4'})
             for td in td_list:
@@ -497,30 +3897,32 @@ class DNSDumpster(ModuleApi):
                     pos = subdomain.find(' ')
                     if pos != -1:
                         subdomain = subdomain[pos + 1:]
-                    if subdomain.endswith(domain) == True:
-                        if subdomain not in subdomains:
-                            subdomains.append(subdomain)
+                    subdomains.add(subdomain)
                     break
 
         # return the subdomains found
-        return subdomains
+        return subdomains.get_subdomains()
 
 
 # Google api
 class Google(ModuleSearchEngine):
 
+    rate_limit = 1
+    process_parsing = True
+
     # create a google object
     def __init__(self, verbose=True, fast=False):
         super().__init__(verbose=verbose, fast=fast)
         self.base_url = "https://www.google.com/search"
 
-    # query a domain page from google
-    def query_domain_page(self, domain, page):
-
-        # query the website
-        headers = { 'user-agent': UserAgent().random }
+    # get the headers and the parameters of the request of a domain page from google
+    def get_page_request(self, domain, page):
+        headers = { 'user-agent': self.get_random_user_agent() }
         params = { 'q': domain, 'start': (page - 1) * 10 }
-        response = self.session.get(self.base_url, headers=headers, params=params)
+        return { 'headers': headers, 'params': params }
+
+    # check the response of a domain page from google and return its text
+    def read_page_response(self, response):
 
         # check for errors
         if response.status_code == 429:
@@ -535,11 +3937,15 @@ class Google(ModuleSearchEngine):
         # return the response text
         return response.text
     
+    # check if a tag is needed to parse a query response
+    def is_parsed_tag(self, name, attrs):
+        return name == 'title' or (name == 'div' and attrs.get('id') == 'rso')
+
     # parse the query response from google
     def parse_query_response(self, text, domain):
 
-        # convert the text response to html
-        soup = BeautifulSoup(text, features="html.parser")
+        # convert the title and the results of the text response to html
+        soup = self.parse_html(text, parse_only=SoupStrainer(self.is_parsed_tag))
         if soup.find('title').text.find(domain) == -1:
             if self.verbose == True:
                 self.print_error("captcha detected.")
@@ -547,7 +3953,7 @@ class Google(ModuleSearchEngine):
         
         # find the links from the html
         rso = soup.find('div', {'id': 'rso'})
-        urls = []
+        urls = SubdomainsCollector()
         total_urls = 0
         if rso is not None:
             for tag in rso:
@@ -555,8 +3961,7 @@ class Google(ModuleSearchEngine):
                 for a_tag in a_tags:
                     total_urls += 1
                     try:
-                        if a_tag['href'] not in urls:
-                            urls.append(a_tag['href'])
+                        urls.add(a_tag['href'])
                     except KeyError:
                         pass
         
@@ -568,50 +3973,45 @@ class Google(ModuleSearchEngine):
             return None
         
         # parse a subdomains list from the urls list
-        subdomains = []
+        subdomains = SubdomainsCollector()
         for url in urls:
             subdomain = self.get_domain_from_url(url)
-            if subdomain is not None and subdomain.endswith(domain) == True:
-                if subdomain not in subdomains:
-                    subdomains.append(subdomain)
+            if subdomain is not None:
+                subdomains.add(subdomain)
 
         # return the subdomains list
-        return subdomains
+        return subdomains.get_subdomains()
 
 
 # Bing api
 class Bing(ModuleSearchEngine):
 
+    rate_limit = 2
+    process_parsing = True
+
     # create a bing object
     def __init__(self, verbose=True, fast=False):
         super().__init__(verbose=verbose, fast=fast)
         self.base_url = "https://www.bing.com/search"
-        self.user_agent = UserAgent().random
+        self.user_agent = self.get_random_user_agent()
 
-    # query the domain from bing
-    def query_domain_page(self, domain, page):
-        
-        # query the website
+    # get the headers and the parameters of the request of a domain page from bing
+    def get_page_request(self, domain, page):
         headers = { 'user-agent': self.user_agent }
         first = '1' if page == 1 else f"{(page - 1)}1"
         params = { 'q': domain, 'first': first }
-        response = self.session.get(self.base_url, headers=headers, params=params)
-
-        # check for errors
-        if response.status_code != 200:
-            if self.verbose == True:
-                self.print_error(f"received unknown response code: '{response.status_code}'.")
-            return None
-        
-        # return the response text
-        return response.text
+        return { 'headers': headers, 'params': params }
     
+    # check if a tag is needed to parse a query response
+    def is_parsed_tag(self, name, attrs):
+        return name == 'title' or (name == 'ol' and attrs.get('id') == 'b_results')
+
     # parse a query response from bing
     def parse_query_response(self, text, domain):
 
-        # convert the text response to html
+        # convert the title and the results of the text response to html
         try:
-            soup = BeautifulSoup(text, features="html.parser")
+            soup = self.parse_html(text, parse_only=SoupStrainer(self.is_parsed_tag))
         except TypeError:
             if self.verbose == True:
                 self.print_error("received unknown content type.")
@@ -629,8 +4029,7 @@ class Bing(ModuleSearchEngine):
         results = b_results.find_all('li', {'class': 'b_algo'})
 
         # parse all subdomains from the results
-        subdomains = []
-        results_domains = []
+        results_domains = SubdomainsCollector()
         for result in results:
             link = result.find('a', {'class': 'tilk'})
             if link is None:
@@ -645,34 +4044,32 @@ class Bing(ModuleSearchEngine):
             pos = result_domain.find('/')
             if pos != -1:
                 result_domain = result_domain[:pos]
-            if result_domain not in results_domains:
-                results_domains.append(result_domain)
-            if result_domain.endswith(domain) == True:
-                subdomains.append(result_domain)
+            results_domains.add(result_domain)
         
         # check if we got a shadow ban
-        if results_domains == [ 'www.bing.com' ]:
+        if results_domains.get_subdomains() == [ 'www.bing.com' ]:
             if self.verbose == True:
                 self.print_error("shadow ban detected.")
             return None
         
         # return the list of subdomains
-        return subdomains
+        return results_domains.get_subdomains()
 
 
 # Yahoo api
 class Yahoo(ModuleSearchEngine):
 
+    rate_limit = 2
+    process_parsing = True
+
     # create a yahoo object
     def __init__(self, verbose=True, fast=False):
         super().__init__(verbose=verbose, fast=fast)
         self.base_url = "https://fr.search.yahoo.com/search"
-        self.user_agent = UserAgent().random
+        self.user_agent = self.get_random_user_agent()
 
-    # query the domain from yahoo
-    def query_domain_page(self, domain, page):
-        
-        # query the website
+    # get the headers and the parameters of the request of a domain page from yahoo
+    def get_page_request(self, domain, page):
         headers = { 'user-agent': self.user_agent }
         params = {
             'p': domain,
@@ -683,24 +4080,14 @@ class Yahoo(ModuleSearchEngine):
         if page > 1:
             page_offset = ((page - 1) * 7) + 1
             params['b']  = page_offset
-        response = self.session.get(self.base_url, headers=headers, params=params)
-
-        # check for errors
-        if response.status_code != 200:
-            if self.verbose == True:
-                self.print_error(f"received unknown response code: '{response.status_code}'.")
-            return None
-        
-        # return the response
-        return response
+        return { 'headers': headers, 'params': params }
     
     # parse a query response from yahoo
-    def parse_query_response(self, response, domain):
+    def parse_query_response(self, text, domain):
 
         # parse the html text
-        text = response.text
         try:
-            soup = BeautifulSoup(text, features="html.parser")
+            soup = self.parse_html(text, parse_only=SoupStrainer('a'))
         except TypeError:
             if self.verbose == True:
                 self.print_error("received unknown content type.")
@@ -708,7 +4095,7 @@ class Yahoo(ModuleSearchEngine):
         
         # find all links
         links = soup.find_all('a')
-        subdomains = []
+        subdomains = SubdomainsCollector()
         for link in links:
 
             # parse the link url
@@ -728,94 +4115,154 @@ class Yahoo(ModuleSearchEngine):
 
             # get the subdomain from the url
             subdomain = self.get_domain_from_url(url)
-            if subdomain is not None and subdomain.endswith(domain) == True:
-                if subdomain not in subdomains:
-                    subdomains.append(subdomain)
+            if subdomain is not None:
+                subdomains.add(subdomain)
         
         # return the list of subdomains found
-        return subdomains
+        return subdomains.get_subdomains()
 
 
 # VirusTotal api
 class VirusTotal(ModuleApiWithKey):
 
+    # the free api allows 4 requests per minute
+    rate_limit = 4 / 60
+    rate_burst = 4
+
     # create a VirusTotal object
     def __init__(self, api_key, verbose=True, fast=False):
         super().__init__(api_key, verbose=verbose, fast=fast)
         self.base_url = "https://www.virustotal.com/api/v3/domains/"
 
     # get a list of subdomains
-    def get_subdomains(self, domain):
+    def get_subdomains(self, domain, callback=None):
 
         # download all subdomains from a domain
         if self.verbose == True:
             self.print("Starting subdomains discovery...")
-        self.subdomains = self.download_relationship(domain)
+        subdomains = self.download_relationship(domain, callback=callback)
 
         # check if we got an error
-        if self.subdomains is None:
+        if subdomains is None:
             return None
         
         # return the list of subdomains found
+        self.subdomains = subdomains
+        if self.verbose == True:
+            self.print_subdomains_count(subdomains)
+        return subdomains
+
+    # get a list of subdomains asynchronously
+    async def aget_subdomains(self, domain, callback=None):
+
+        # download all subdomains from a domain
+        if self.verbose == True:
+            self.print("Starting subdomains discovery...")
+        subdomains = await self.adownload_relationship(domain, callback=callback)
+
+        # check if we got an error
+        if subdomains is None:
+            return None
+
+        # return the list of subdomains found
+        self.subdomains = subdomains
         if self.verbose == True:
-            subdomains_count = len(self.subdomains)
-            self.print(f"{subdomains_count if subdomains_count > 0 else 'no'} subdomain{'s' if subdomains_count != 1 else ''} found.")
-        return self.subdomains
+            self.print_subdomains_count(subdomains)
+        return subdomains
 
     # download a relationship
-    def download_relationship(self, domain):
+    def download_relationship(self, domain, callback=None):
 
         # download the first domain page
-        results = self.download_relationship_page(domain)
+        results = self.query_cached_response(domain, "cursor:", self.download_relationship_page, domain)
         if results is None:
             return None
         
-        # parse the subdomains from the first page
-        subdomains = []
-        for subdomain in results['data']:
-            if subdomain['id'] not in subdomains:
-                subdomains.append(subdomain['id'])
+        # download pages until there is no next one, only the first page if we do a fast scan
+        subdomains = SubdomainsCollector()
+        while True:
 
-        # return the first page if we do a fast scan
-        if self.fast_scan == True:
-            return subdomains
+            # start downloading the next page while the current one is parsed
+            next_results = None
+            if self.fast_scan == False and 'cursor' in results['meta']:
+                cursor = results['meta']['cursor']
+                next_results = self.get_pages_executor().submit(copy_context().run, self.query_cached_response, domain, f"cursor:{cursor}", self.download_relationship_page, domain, cursor)
+
+            # parse the subdomains from the current page
+            page_subdomains = self.parse_response(results, domain)
+            subdomains.update(page_subdomains)
+            if self.report_subdomains(page_subdomains, callback) == False:
+                if next_results is not None:
+                    next_results.cancel()
+                break
+
+            # wait for the next page
+            if next_results is None:
+                break
+            results = next_results.result()
+            if results is None:
+                break
+
+        # return a list of all subdomains found
+        return subdomains.get_subdomains()
+
+    # download a relationship asynchronously
+    async def adownload_relationship(self, domain, callback=None):
+
+        # download the first domain page
+        results = await self.aquery_cached_response(domain, "cursor:", self.adownload_relationship_page, domain)
+        if results is None:
+            return None
 
-        # parse the next page cursor from the first page
-        cursor = None
-        if 'cursor' in results['meta']:
-            cursor = results['meta']['cursor']
+        # download pages until there is no next one, only the first page if we do a fast scan
+        subdomains = SubdomainsCollector()
+        while True:
 
-        # download pages until there is no next one
-        while cursor is not None:
+            # start downloading the next page while the current one is parsed
+            next_results = None
+            if self.fast_scan == False and 'cursor' in results['meta']:
+                cursor = results['meta']['cursor']
+                next_results = asyncio.ensure_future(self.aquery_cached_response(domain, f"cursor:{cursor}", self.adownload_relationship_page, domain, cursor))
+
+            # parse the subdomains from the current page
+            page_subdomains = await self.aparse_response(results, domain)
+            subdomains.update(page_subdomains)
+            if self.report_subdomains(page_subdomains, callback) == False:
+                if next_results is not None:
+                    next_results.cancel()
+                break
 
-            # download the next domain page
-            results = self.download_relationship_page(domain, cursor=cursor)
+            # wait for the next page
+            if next_results is None:
+                break
+            results = await next_results
             if results is None:
                 break
-            
-            # parse the subdomains from the next page
-            for subdomain in results['data']:
-                if subdomain['id'] not in subdomains:
-                    subdomains.append(subdomain['id'])
-
-            # parse the next page cursor from the next page
-            cursor = None
-            if 'cursor' in results['meta']:
-                cursor = results['meta']['cursor']
 
         # return a list of all subdomains found
-        return subdomains
-    
+        return subdomains.get_subdomains()
+
     # download a relationship page
     def download_relationship_page(self, domain, cursor=None, limit=40):
-        
-        # query the api
+        url, options = self.get_relationship_request(domain, cursor, limit)
+        return self.read_relationship_response(self.request('GET', url, **options))
+
+    # download a relationship page asynchronously
+    async def adownload_relationship_page(self, domain, cursor=None, limit=40):
+        url, options = self.get_relationship_request(domain, cursor, limit)
+        return self.read_relationship_response(await self.arequest('GET', url, **options))
+
+    # get the url, the headers and the parameters of the request of a relationship page
+    def get_relationship_request(self, domain, cursor, limit):
         url = self.base_url + f"{domain}/subdomains"
         params = { 'limit': limit }
         if cursor is not None:
             params['cursor'] = cursor
         headers = { 'x-apikey': self.api_key }
-        response = self.session.get(url, headers=headers, params=params)
+        return url, { 'headers': headers, 'params': params }
+
+    # check the response of a relationship page and return its json content
+    def read_relationship_response(self, response):
 
         # check for errors
         if response.status_code == 401:
@@ -834,10 +4281,16 @@ class VirusTotal(ModuleApiWithKey):
         # return the json response
         return response.json()
 
+    # parse the subdomains from a relationship page
+    def parse_query_response(self, results, domain):
+        return [subdomain['id'] for subdomain in results['data']]
+
 
 # Shodan api
 class Shodan(ModuleApiWithKey):
 
+    rate_limit = 1
+
     # create a shodan object
     def __init__(self, api_key, verbose=True):
         super().__init__(api_key, verbose=verbose)
@@ -845,121 +4298,156 @@ class Shodan(ModuleApiWithKey):
     
     # query a domain information from shodan
     def query_domain(self, domain):
-
-        # query the api
         params = { 'key': self.api_key }
-        response = self.session.get(self.base_url + domain, params=params)
+        return self.read_json_response(self.request('GET', self.base_url + domain, params=params))
 
-        # check for errors
-        if response.status_code != 200:
-            if self.verbose == True:
-                self.print_error(f"received unknown response code: '{response.status_code}'.")
-            return None
-        
-        # return the json response
-        return response.json()
+    # query a domain information from shodan asynchronously
+    async def aquery_domain(self, domain):
+        params = { 'key': self.api_key }
+        return self.read_json_response(await self.arequest('GET', self.base_url + domain, params=params))
     
     # parse the query response
     def parse_query_response(self, data, domain):
-        subdomains = []
+        subdomains = SubdomainsCollector()
         for subdomain in data["subdomains"]:
-            full_subdomain = subdomain + '.' + domain
-            if full_subdomain not in subdomains:
-                subdomains.append(full_subdomain)
-        return subdomains
+            subdomains.add(subdomain + '.' + domain)
+        return subdomains.get_subdomains()
 
 # default module api class with a key
 class MerkleMap(ModuleApi):
     def __init__(self, verbose=True):
         super().__init__(verbose=verbose)
         self.base_url = "https://api.merklemap.com/search"
-        self.user_agent = UserAgent().random
+        self.user_agent = self.get_random_user_agent()
 
         # query a domain information from merklemap
     def query_domain(self, domain):
-
-        # query the api
         params = { 'query': domain }
-        response = self.session.get(self.base_url, params=params)
+        return self.read_json_response(self.request('GET', self.base_url, params=params))
 
-        # check for errors
-        if response.status_code != 200:
-            if self.verbose == True:
-                self.print_error(f"received unknown response code: '{response.status_code}'.")
-            return None
-        # return the json response
-        return response.json()
+    # query a domain information from merklemap asynchronously
+    async def aquery_domain(self, domain):
+        params = { 'query': domain }
+        return self.read_json_response(await self.arequest('GET', self.base_url, params=params))
 
     def parse_query_response(self, data, domain):
-        subdomains = []
+        subdomains = SubdomainsCollector()
         for subdomain in data["results"]:
-          if subdomain not in subdomains:
-            subdomains.append(subdomain['domain'])
-        return subdomains
+            subdomains.add(subdomain['domain'])
+        return subdomains.get_subdomains()
 
 
 # Censys api
 class Censys(ModuleApiWithAuth):
 
+    rate_limit = 2.5
+    process_parsing = True
+
     # create a censys object
     def __init__(self, app_id, secret, verbose=True, fast=True):
         super().__init__(app_id, secret, verbose=verbose, fast=fast)
         self.base_url = 'https://search.censys.io/api/v2/certificates/search'
 
     # get the subdomains from a domain
-    def get_subdomains(self, domain):
+    def get_subdomains(self, domain, callback=None):
 
         # get the first page
         if self.verbose == True:
             self.print("Starting subdomains discovery...")
-        self.subdomains = []
-        response = self.query_domain_page(domain)
+        subdomains = SubdomainsCollector()
+        response = self.query_cached_response(domain, "cursor:", self.query_domain_page, domain)
         if response is None:
+            self.subdomains = []
             return self.subdomains
         
-        # parse the subdomains from the first pages
+        # get the next pages, only the first one in fast mode
         page_count = 1
-        page_subdomains = self.parse_query_response(response)
-        for subdomain in page_subdomains:
-            if subdomain.endswith(domain) == False:
-                continue
-            if subdomain in self.subdomains:
-                continue
-            self.subdomains.append(subdomain)
+        while True:
 
-        # check if we are in fast mode
-        if self.fast_scan == True:
+            # start downloading the next page while the current one is parsed
+            next_response = None
+            cursor = response['result']['links']['next']
+            if self.fast_scan == False and cursor != '' and page_count < 10:
+                page_count += 1
+                next_response = self.get_pages_executor().submit(copy_context().run, self.query_cached_response, domain, f"cursor:{cursor}", self.query_domain_page, domain, cursor)
+
+            # parse the subdomains from the current page
+            page_subdomains = self.parse_response(response, domain)
+            subdomains.update(page_subdomains)
+            if self.report_subdomains(page_subdomains, callback) == False:
+                if next_response is not None:
+                    next_response.cancel()
+                break
+
+            # wait for the next page
+            if next_response is None:
+                break
+            response = next_response.result()
+            if response is None:
+                break
+    
+        # return the list of subdomains found
+        subdomains = subdomains.get_subdomains()
+        self.subdomains = subdomains
+        if self.verbose == True:
+            self.print_subdomains_count(subdomains)
+        return subdomains
+
+    # get the subdomains from a domain asynchronously
+    async def aget_subdomains(self, domain, callback=None):
+
+        # get the first page
+        if self.verbose == True:
+            self.print("Starting subdomains discovery...")
+        subdomains = SubdomainsCollector()
+        response = await self.aquery_cached_response(domain, "cursor:", self.aquery_domain_page, domain)
+        if response is None:
+            self.subdomains = []
             return self.subdomains
 
-        # get the next page cursor if any
-        cursor = response['result']['links']['next']
+        # get the next pages, only the first one in fast mode
+        page_count = 1
+        while True:
+
+            # start downloading the next page while the current one is parsed
+            next_response = None
+            cursor = response['result']['links']['next']
+            if self.fast_scan == False and cursor != '' and page_count < 10:
+                page_count += 1
+                next_response = asyncio.ensure_future(self.aquery_cached_response(domain, f"cursor:{cursor}", self.aquery_domain_page, domain, cursor))
+
+            # parse the subdomains from the current page
+            page_subdomains = await self.aparse_response(response, domain)
+            subdomains.update(page_subdomains)
+            if self.report_subdomains(page_subdomains, callback) == False:
+                if next_response is not None:
+                    next_response.cancel()
+                break
 
-        # get all next pages
-        while cursor != '' and page_count < 10:
-            page_count += 1
-            sleep(0.4)
-            response = self.query_domain_page(domain, cursor=cursor)
+            # wait for the next page
+            if next_response is None:
+                break
+            response = await next_response
             if response is None:
                 break
-            page_subdomains = self.parse_query_response(response)
-            for subdomain in page_subdomains:
-                if subdomain.endswith(domain) == False:
-                    continue
-                if subdomain in self.subdomains:
-                    continue
-                self.subdomains.append(subdomain)
-            cursor = response['result']['links']['next']
-    
+
         # return the list of subdomains found
+        subdomains = subdomains.get_subdomains()
+        self.subdomains = subdomains
         if self.verbose == True:
-            subdomains_count = len(self.subdomains)
-            self.print(f"{subdomains_count if subdomains_count > 0 else 'no'} subdomain{'s' if subdomains_count != 1 else ''} found.")
-        return self.subdomains
+            self.print_subdomains_count(subdomains)
+        return subdomains
 
     # get a domain page
     def query_domain_page(self, domain, cursor=None):
+        return self.read_page_response(self.request('GET', self.base_url, auth=self.auth, **self.get_page_request(domain, cursor)))
 
-        # query the api
+    # get a domain page asynchronously
+    async def aquery_domain_page(self, domain, cursor=None):
+        return self.read_page_response(await self.arequest('GET', self.base_url, auth=self.auth, **self.get_page_request(domain, cursor)))
+
+    # get the headers and the parameters of the request of a domain page
+    def get_page_request(self, domain, cursor):
         headers = { "Content-Type": "application/json" }
         params = {
             "q": domain,
@@ -968,10 +4456,11 @@ class Censys(ModuleApiWithAuth):
         }
         if cursor is not None:
             params['cursor'] = cursor
+        return { 'headers': headers, 'params': params }
+
+    # check the response of a domain page and return its json content
+    def read_page_response(self, response):
 
-        # send the request
-        response = self.session.get(self.base_url, headers=headers, params=params, auth=self.auth)
-        
         # check for errors
         if response.status_code == 429:
             if self.verbose == True:
@@ -989,11 +4478,11 @@ class Censys(ModuleApiWithAuth):
         # return the json response
         return response.json()
     
-    # parse the subdomains from a query response
-    def parse_query_response(self, response):
+    # parse the subdomains of a domain from a query response
+    def parse_query_response(self, response, domain):
 
         # check each certificate from the response
-        subdomains = []
+        subdomains = SubdomainsCollector()
         hits = response['result']['hits']
         for certificate in hits:
 
@@ -1003,28 +4492,13 @@ class Censys(ModuleApiWithAuth):
             for info in infos:
                 if info.startswith("CN=") == True:
                     common_name = info
-            subdomain = common_name[3:]
-            pos = subdomain.find('*.')
-            while pos != -1:
-                subdomain = subdomain[pos + 2:]
-                pos = subdomain.find('*.')
-            if subdomain.find('*') == -1:
-                if subdomain not in subdomains:
-                    subdomains.append(subdomain)
+            subdomains.add(common_name[3:])
 
             # check the alternate names
-            alternate_names = certificate['names']
-            for subdomain in alternate_names:
-                pos = subdomain.find('*.')
-                while pos != -1:
-                    subdomain = subdomain[pos + 2:]
-                    pos = subdomain.find('*.')
-                if subdomain.find('*') == -1:
-                    if subdomain not in subdomains:
-                        subdomains.append(subdomain)
+            subdomains.update(certificate['names'])
 
-        # return the list of subdomains found
-        return subdomains
+        # return the list of names found, the subdomains of the domain are kept by the normalizer
+        return subdomains.get_subdomains()
     
 
 # run the main function if needed